@@ -9,9 +9,11 @@
 import os
 import sys
 import time
+import pandas as pd
 from tqdm import tqdm
 from lib.config import Config
-from lib.feishu_client import FeishuClient
+from lib.feishu_client import FeishuClient, parse_field_text
+from lib.bill_parser import clean_field_value
 from core.logger import setup_logger
 from loguru import logger
 
@@ -94,17 +96,11 @@ def backfill_ledger(config_path='config.json'):
             for f in fields:
                 logger.debug(f"  - {f['field_name']} ({f['type']}): {f['field_id']}")
 
-            counterparty_field_id = None
-            category_field_id = None
-            note_field_id = None
-            
-            for field in fields:
-                if field['field_name'] == '交易对方':
-                    counterparty_field_id = field['field_id']
-                elif field['field_name'] == '分类':
-                    category_field_id = field['field_id']
-                elif field['field_name'] == '备注':
-                    note_field_id = field['field_id']
+            # 单次遍历构建 字段名->field_id 映射,常数时间查找
+            field_ids = {f['field_name']: f['field_id'] for f in fields}
+            counterparty_field_id = field_ids.get('交易对方')
+            category_field_id = field_ids.get('分类')
+            note_field_id = field_ids.get('备注')
             
             if not counterparty_field_id:
                 logger.warning(f"账本 '{account_name}' 缺少 '交易对方' 列。请先在飞书中添加该列。")
@@ -114,70 +110,64 @@ def backfill_ledger(config_path='config.json'):
                 logger.warning(f"账本 '{account_name}' 缺少 '备注' 列，无法解析。")
                 continue
 
-            # 3.2 拉取记录
-            logger.info(f"拉取所有记录...")
-            all_records = []
-            page_token = None
-            has_more = True
-            
-            while has_more:
-                records, page_token, has_more = feishu.list_records(app_token, table_id, page_token=page_token, page_size=500)
-                all_records.extend(records)
-                # 避免触发频率限制
-                time.sleep(0.1)
+            # 3.2 拉取记录: 服务端过滤,只取'交易对方'为空的记录
+            # 重跑时已回填的记录不再下发,省掉绝大部分网络和解析开销
+            logger.info(f"拉取'交易对方'为空的记录...")
+            all_records = feishu.search_records(
+                app_token, table_id,
+                filter_conditions={
+                    'conjunction': 'and',
+                    'conditions': [
+                        {'field_name': '交易对方', 'operator': 'isEmpty', 'value': []}
+                    ]
+                },
+                page_size=500
+            )
             
             logger.info(f"共获取 {len(all_records)} 条记录，开始分析...")
             
-            records_to_update = []
-            
-            # 3.3 分析并准备更新
-            for index, record in enumerate(tqdm(all_records, desc=f"Analyzing {account_name}")):
-                fields = record.get('fields', {})
-                record_id = record.get('record_id')
-                
-                # 获取字段值 - 使用字段名而非ID，因为飞书API返回的是字段名
-                current_counterparty = fields.get('交易对方')
-                note = fields.get('备注')
-                category = fields.get('分类')
-
-                # DEBUG: 打印前5条记录的状态
-                if index < 5:
-                    logger.debug(f"Record {index}: Note='{note}', Category='{category}', Current CP='{current_counterparty}'")
-                
-                # 如果已有交易对方，跳过
-                if current_counterparty:
-                    # 如果是字符串且非空
-                    if isinstance(current_counterparty, str) and current_counterparty.strip():
-                        continue
-                    # 如果是列表（文本字段可能返回列表）且非空
-                    if isinstance(current_counterparty, list) and current_counterparty:
-                        continue
-                    # 如果是字典
-                    if isinstance(current_counterparty, dict) and current_counterparty:
-                        continue
-                    pass 
-                
-                # 解析字段值
-                note_str = str(note).strip() if note else ""
-                category_str = str(category).strip() if category else ""
-                
-                if not note_str:
-                    continue
-                    
-                # 提取交易对方
-                extracted_counterparty = extract_counterparty_from_note(note_str, category_str)
-                
-                if index < 5 and not current_counterparty:
-                     logger.debug(f"  -> Extracted: '{extracted_counterparty}'")
-
-                if extracted_counterparty:
-                    # 更新时也使用字段名作为key
-                    records_to_update.append({
-                        "record_id": record_id,
-                        "fields": {
-                            '交易对方': extracted_counterparty
-                        }
-                    })
+            # 3.3 分析并准备更新 (整列向量化处理)
+            # 获取字段值 - 使用字段名而非ID，因为飞书API返回的是字段名
+            fields_list = [r.get('fields', {}) for r in all_records]
+            record_ids = pd.Series([r.get('record_id') for r in all_records], dtype=object)
+            # search接口把文本字段下发成富文本片段数组 [{'text': ...}],
+            # 先经parse_field_text还原成纯文本, 否则str()会产出repr串
+            notes = pd.Series(
+                [clean_field_value(parse_field_text(f.get('备注'))) for f in fields_list],
+                dtype=object)
+            cats = pd.Series(
+                [clean_field_value(parse_field_text(f.get('分类'))) for f in fields_list],
+                dtype=object)
+
+            # 已有交易对方的记录跳过 (字符串/列表/字典非空都算已有)
+            has_counterparty = pd.Series([
+                bool(f.get('交易对方'))
+                and not (isinstance(f.get('交易对方'), str) and not f.get('交易对方').strip())
+                for f in fields_list
+            ])
+
+            # 提取交易对方, 与 extract_counterparty_from_note 同语义:
+            # 策略1: '分类-商户' 取第一个'-'后的部分
+            # 策略2: 备注不等于分类时, 备注即商户
+            parts = notes.str.split('-', n=1, expand=True)
+            tails = parts[1].str.strip() if 1 in parts.columns else pd.Series(pd.NA, index=notes.index)
+            extracted = tails.where(
+                tails.notna() & (tails != ''),
+                notes.where(notes != cats)
+            )
+
+            mask = ~has_counterparty & (notes != '') & extracted.notna() & (extracted != '')
+
+            # DEBUG: 打印前5条待回填记录
+            for note, cat, cp in list(zip(notes[mask], cats[mask], extracted[mask]))[:5]:
+                logger.debug(f"Note='{note}', Category='{cat}' -> Extracted: '{cp}'")
+
+            # 单次结构化组装更新payload, dict化在C层完成
+            df_updates = pd.DataFrame({
+                'record_id': record_ids[mask].to_numpy(),
+                'fields': [{'交易对方': cp} for cp in extracted[mask].tolist()],
+            })
+            records_to_update = df_updates.to_dict(orient='records')
 
 
             # 3.4 批量更新
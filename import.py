@@ -9,13 +9,29 @@ import time
 import argparse
 import os
 import glob
+import heapq
+import itertools
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
 from tqdm import tqdm
 from lib.config import Config
 from lib.feishu_client import FeishuClient
 from lib.bill_parser import BillParser
+from lib.sent_cache import SentCache
 from lib.logger import setup_logger
 
 
+def _chunks(iterable, size):
+    """把任意迭代器按固定大小切块, 不整体物化"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def import_account_bills(config, account_name, feishu_client, logger):
     """
     导入指定账本的所有账单文件
@@ -56,6 +72,9 @@ def import_account_bills(config, account_name, feishu_client, logger):
 
     logger.info(f"找到账单文件: {len(csv_files)} 个CSV, {len(xlsx_files)} 个XLSX")
 
+    # 已导入记录缓存: 精确拦截时间戳水位线漏掉的重复记录
+    sent_cache = SentCache(os.path.join(data_dir, '.sent_cache.db'))
+
     total_success = 0
     total_failed = 0
 
@@ -67,60 +86,62 @@ def import_account_bills(config, account_name, feishu_client, logger):
         print(f"找到 {len(files)} 个文件")
         logger.info(f"开始处理 {source_name} 账单: {len(files)} 个文件, 上次导入时间戳: {last_timestamp}")
 
-        # 合并所有文件的记录
-        all_records = []
-        for file_path in files:
-            try:
-                print(f"  解析: {os.path.basename(file_path)}")
-                records = BillParser.parse(file_path, source_type)
-                all_records.extend(records)
-                logger.info(f"成功解析文件 {os.path.basename(file_path)}: {len(records)} 条记录")
-            except Exception as e:
-                print(f"  解析失败: {e}")
-                logger.error(f"解析文件失败 {os.path.basename(file_path)}: {e}")
-                continue
-
-        print(f"  共解析 {len(all_records)} 条记录")
-        logger.info(f"{source_name} 总共解析 {len(all_records)} 条记录")
-
-        # 过滤新记录
-        new_records = [r for r in all_records if r['日期'] > last_timestamp]
-
-        if not new_records:
-            print(f"  没有新记录需要导入")
-            logger.info(f"{source_name} 没有新记录需要导入")
-            continue
+        # 每个文件独立,多进程并行解析; 按文件保留结果(文件内按日期排序),后续做k路归并
+        file_results = []
+        total_parsed = 0
+        max_workers = min(len(files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(BillParser.parse, file_path, source_type): file_path
+                for file_path in files
+            }
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    # BillParser.parse 返回的记录已按日期排序
+                    records = future.result()
+                    file_results.append(records)
+                    total_parsed += len(records)
+                    print(f"  解析: {os.path.basename(file_path)} ({len(records)} 条)")
+                    logger.info(f"成功解析文件 {os.path.basename(file_path)}: {len(records)} 条记录")
+                except Exception as e:
+                    print(f"  解析失败 {os.path.basename(file_path)}: {e}")
+                    logger.error(f"解析文件失败 {os.path.basename(file_path)}: {e}")
 
-        print(f"  发现 {len(new_records)} 条新记录")
-        logger.info(f"{source_name} 发现 {len(new_records)} 条新记录")
+        print(f"  共解析 {total_parsed} 条记录")
+        logger.info(f"{source_name} 总共解析 {total_parsed} 条记录")
 
-        # 按时间排序
-        new_records.sort(key=lambda x: x['日期'])
+        # 流式管道: k路归并(全局按日期有序) -> 水位线/已导入缓存过滤 -> 按批切块
+        # 不再物化合并后的全量列表,峰值内存只与batch_size相关
+        merged = heapq.merge(*file_results, key=lambda x: x['日期'])
+        new_records_iter = (
+            r for r in merged
+            if r['日期'] > last_timestamp
+            and not sent_cache.contains((r['日期'], r['金额'], r['分类']))
+        )
 
         # 批量导入
         success_count = 0
         fail_count = 0
         max_timestamp = last_timestamp
+        batch_no = 0
 
         batch_size = settings['batch_size']  # 每批最多500条
+        upload_workers = settings.get('upload_workers', 4)
 
-        # 使用tqdm进度条
-        with tqdm(total=len(new_records), desc=f"  导入{source_name}",
-                  unit="条", ncols=80,
-                  bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]') as pbar:
+        # 使用tqdm进度条, 线程池并发上传批次
+        # (FeishuClient内部按表限制并发写入,避免触发飞书限流)
+        with tqdm(desc=f"  导入{source_name}", unit="条", ncols=80) as pbar, \
+                ThreadPoolExecutor(max_workers=upload_workers) as executor:
 
-            # 分批处理
-            for i in range(0, len(new_records), batch_size):
-                batch = new_records[i:i+batch_size]
-                batch_records = [{"fields": r} for r in batch]
+            futures = {}
+
+            def consume(future):
+                nonlocal success_count, fail_count, max_timestamp
+                no, batch = futures.pop(future)
 
                 try:
-                    # 批量创建记录
-                    result = feishu_client.batch_create_records(
-                        account['app_token'],
-                        account['table_id'],
-                        batch_records
-                    )
+                    result = future.result()
 
                     batch_success = result.get('success', 0)
                     batch_failed = result.get('failed', 0)
@@ -128,12 +149,16 @@ def import_account_bills(config, account_name, feishu_client, logger):
                     success_count += batch_success
                     fail_count += batch_failed
 
-                    logger.info(f"批次 {i//batch_size + 1} 完成: 成功 {batch_success}, 失败 {batch_failed}")
+                    logger.info(f"批次 {no} 完成: 成功 {batch_success}, 失败 {batch_failed}")
 
-                    # 更新最大时间戳(只统计成功的记录)
+                    # 更新最大时间戳并登记缓存(只统计成功的记录)
                     if batch_success > 0:
                         for r in batch[:batch_success]:
                             max_timestamp = max(max_timestamp, r['日期'])
+                        sent_cache.add_many(
+                            (r['日期'], r['金额'], r['分类'])
+                            for r in batch[:batch_success]
+                        )
 
                     # 更新进度条
                     pbar.update(len(batch))
@@ -147,11 +172,36 @@ def import_account_bills(config, account_name, feishu_client, logger):
 
                 except Exception as e:
                     fail_count += len(batch)
-                    tqdm.write(f"  批次 {i//batch_size + 1} 导入失败: {e}")
-                    logger.error(f"批次 {i//batch_size + 1} 导入失败: {e}")
+                    tqdm.write(f"  批次 {no} 导入失败: {e}")
+                    logger.error(f"批次 {no} 导入失败: {e}")
                     pbar.update(len(batch))
                     pbar.set_postfix({"成功": success_count, "失败": fail_count})
 
+            # 分批提交,让网络往返相互重叠; 在途批次数有上限,内存有界
+            for batch in _chunks(new_records_iter, batch_size):
+                batch_no += 1
+                batch_records = [{"fields": r} for r in batch]
+                future = executor.submit(
+                    feishu_client.batch_create_records,
+                    account['app_token'],
+                    account['table_id'],
+                    batch_records
+                )
+                futures[future] = (batch_no, batch)
+
+                if len(futures) >= upload_workers * 2:
+                    done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        consume(finished)
+
+            for future in as_completed(list(futures)):
+                consume(future)
+
+        if batch_no == 0:
+            print(f"  没有新记录需要导入")
+            logger.info(f"{source_name} 没有新记录需要导入")
+            continue
+
         print()
         print(f"  完成: 成功 {success_count} | 失败 {fail_count}")
         logger.info(f"{source_name} 导入完成: 成功 {success_count}, 失败 {fail_count}")
@@ -165,6 +215,11 @@ def import_account_bills(config, account_name, feishu_client, logger):
         total_success += success_count
         total_failed += fail_count
 
+    sent_cache.close()
+
+    # 时间戳更新只打脏标记, 此处一次性写回config.json
+    config.flush()
+
     print(f"\n{'='*60}")
     print(f"账本 {account['name']} 导入完成")
     print(f"总计: 成功 {total_success} | 失败 {total_failed}")
@@ -13,6 +13,7 @@ from tqdm import tqdm
 from lib.config import Config
 from lib.feishu_client import FeishuClient
 from lib.smart_categorizer import SmartCategorizer
+from lib.bill_parser import clean_field_value
 from core.logger import setup_logger
 from loguru import logger
 
@@ -61,14 +62,10 @@ def learn_from_ledger(config_path='config.json'):
         try:
             # 3.1 获取字段定义，找到 "交易对方" 和 "分类" 的 field_id
             fields = feishu.list_fields(app_token, table_id)
-            counterparty_field_id = None
-            category_field_id = None
-            
-            for field in fields:
-                if field['field_name'] == '交易对方':
-                    counterparty_field_id = field['field_id']
-                elif field['field_name'] == '分类':
-                    category_field_id = field['field_id']
+            # 单次遍历构建 字段名->field_id 映射,常数时间查找
+            field_ids = {f['field_name']: f['field_id'] for f in fields}
+            counterparty_field_id = field_ids.get('交易对方')
+            category_field_id = field_ids.get('分类')
             
             if not counterparty_field_id:
                 logger.warning(f"账本 '{account_name}' 缺少 '交易对方' 列，无法学习。请先在飞书中添加该列。")
@@ -81,18 +78,15 @@ def learn_from_ledger(config_path='config.json'):
             # 3.2 拉取记录 (限制最近 1000 条，避免太慢)
             logger.info(f"拉取最近记录...")
             all_records = []
-            page_token = None
-            
-            # 只拉取前 2 页 (每页 500 条)
-            for _ in range(2):
-                records, page_token, has_more = feishu.list_records(app_token, table_id, page_token=page_token, page_size=500)
-                all_records.extend(records)
-                if not has_more:
-                    break
+
+            # 只拉取前 2 页 (每页 500 条),客户端内部预取下一页
+            for page in feishu.iter_records(app_token, table_id, page_size=500, max_pages=2):
+                all_records.extend(page)
             
             logger.info(f"分析 {len(all_records)} 条记录...")
-            
-            learned_count = 0
+
+            # 先在内存中累积修正, 循环结束后一次性写盘
+            learned = {}
             
             # 3.3 对比并学习
             for record in tqdm(all_records, desc=f"Learning {account_name}"):
@@ -111,9 +105,9 @@ def learn_from_ledger(config_path='config.json'):
                      # 但如果作为 list_records, 单选字段通常是 string
                      pass
 
-                # 简单化：尝试提取文本
-                feishu_category_str = str(feishu_category).strip() if feishu_category else ""
-                counterparty_str = str(raw_counterparty).strip() if raw_counterparty else ""
+                # 简单化：尝试提取文本 (字符串短路, None/NaN归一为空串)
+                feishu_category_str = clean_field_value(feishu_category)
+                counterparty_str = clean_field_value(raw_counterparty)
                 
                 # 过滤无效数据
                 if not counterparty_str or not feishu_category_str:
@@ -142,11 +136,13 @@ def learn_from_ledger(config_path='config.json'):
                     # 只有当本地没预测对，且飞书上是有效分类时，才视为用户修正
                     # 此时，我们显式地告诉 SmartCategorizer：
                     # "对于这个商户，用户想要的是 feishu_category_str"
-                    SmartCategorizer.add_correction(counterparty_str, feishu_category_str)
-                    learned_count += 1
-            
-            logger.info(f"在账本 '{account_name}' 中学到了 {learned_count} 条新规则")
-            total_learned += learned_count
+                    learned[counterparty_str] = feishu_category_str
+
+            # 批量落盘, 避免每条修正都重写 corrections.json
+            SmartCategorizer.add_corrections_batch(learned)
+
+            logger.info(f"在账本 '{account_name}' 中学到了 {len(learned)} 条新规则")
+            total_learned += len(learned)
 
         except Exception as e:
             logger.error(f"处理账本 '{account_name}' 时出错: {e}")
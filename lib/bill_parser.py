@@ -8,6 +8,21 @@ from datetime import datetime
 from .smart_categorizer import SmartCategorizer
 
 
+def clean_field_value(value):
+    """
+    将字段值清理为去除首尾空白的字符串
+    已是字符串的值直接strip短路返回;
+    None/NaN返回空串, 避免 str(nan) 产生 'nan' 哨兵字符串
+    :param value: 任意字段值
+    :return: 清理后的字符串
+    """
+    if isinstance(value, str):
+        return value.strip()
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value).strip()
+
+
 class BillParser:
     """账单解析器基类"""
 
@@ -20,190 +35,189 @@ class BillParser:
         :return: 记录列表
         """
         if source_type == 'alipay':
-            records = AlipayParser.parse(filename)
+            df = AlipayParser.parse(filename)
         elif source_type == 'wechat':
-            records = WechatParser.parse(filename)
+            df = WechatParser.parse(filename)
         else:
             raise ValueError(f"不支持的账单类型: {source_type}")
 
-        # 去重(基于时间戳+金额+分类)
-        return BillParser.deduplicate(records)
+        # 去重(基于时间戳+金额+分类)并按日期排序(均在C层完成),
+        # 最后一步才转成飞书API需要的dict列表
+        df = BillParser.deduplicate(df).sort_values('日期', kind='stable')
+        return df.to_dict(orient='records')
 
     @staticmethod
-    def deduplicate(records):
+    def deduplicate(df):
         """
-        去重记录
-        :param records: 原始记录列表
-        :return: 去重后的记录列表
+        去重记录 (C层单次哈希扫描,保留首次出现的记录)
+        :param df: 解析后的记录DataFrame
+        :return: 去重后的DataFrame
         """
-        seen = set()
-        unique_records = []
+        # 使用时间戳+金额+分类作为唯一键
+        return df.drop_duplicates(subset=['日期', '金额', '分类'], keep='first')
 
-        for record in records:
-            # 使用时间戳+金额+分类作为唯一键
-            key = (record['日期'], record['金额'], record['分类'])
-            if key not in seen:
-                seen.add(key)
-                unique_records.append(record)
+    @staticmethod
+    def _build_records(source_type, df, amount, ts_ms, is_income):
+        """
+        从已过滤的列数据组装飞书表格式的DataFrame
+        :param source_type: 来源类型 'alipay' 或 'wechat'
+        :param df: 已过滤的DataFrame (需包含清理后的分类/交易对方列)
+        :param amount: 金额Series
+        :param ts_ms: 毫秒时间戳Series
+        :param is_income: 是否收入的布尔Series
+        :return: 记录DataFrame (列: 备注/日期/收支/分类/金额/交易对方)
+        """
+        categories = df['交易分类'].tolist()
+        counterparties = df['交易对方'].tolist()
+        incomes = is_income.tolist()
+
+        # 使用智能分类器 (批量入口,循环开销在分类器内部摊销)
+        mapped_categories = SmartCategorizer.categorize_batch(
+            source_type, categories, counterparties, incomes
+        )
+
+        # 生成智能备注 (已在批量入口内截断到50字符)
+        notes = SmartCategorizer.generate_note_batch(
+            categories, counterparties, mapped_categories
+        )
+
+        clean_counterparty = SmartCategorizer._clean_counterparty
+
+        # 返回飞书表格式 (保持DataFrame,去重在C层完成)
+        return pd.DataFrame({
+            "备注": notes.to_numpy(),
+            "日期": ts_ms.to_numpy(),
+            "收支": is_income.map({True: '收入', False: '支出'}).to_numpy(),
+            "分类": mapped_categories,
+            "金额": amount.to_numpy(),
+            "交易对方": [clean_counterparty(cp)[:50] for cp in counterparties],
+        })
 
-        return unique_records
+    @staticmethod
+    def _timestamps_ms(dates):
+        """
+        将naive本地时间的datetime Series换算为毫秒时间戳
+        (与 datetime.timestamp() 的本地时区语义保持一致)
+        """
+        local_tz = datetime.now().astimezone().tzinfo
+        return dates.dt.tz_localize(local_tz).dt.as_unit('ms').astype('int64')
 
 
 class AlipayParser:
     """支付宝账单解析器"""
 
+    # 解析所需的列 (其余列如订单号/付款方式直接跳过,不做解析)
+    COLUMNS = ['交易时间', '交易分类', '交易对方', '收/支', '金额', '交易状态']
+    _COLUMN_SET = frozenset(COLUMNS)
+
     @staticmethod
     def parse(filename):
-        """解析支付宝账单CSV (GBK编码,跳过前24行)"""
-        records = []
-
+        """解析支付宝账单CSV (GBK编码,跳过前24行,列级向量化处理)"""
         # 读取CSV,跳过前24行,使用GBK编码
-        df = pd.read_csv(filename, encoding='gbk', skiprows=24)
-
-        for _, row in df.iterrows():
-            try:
-                # 提取字段
-                date_str = str(row.get('交易时间', '')).strip()
-                category = str(row.get('交易分类', '')).strip()
-                counterparty = str(row.get('交易对方', '')).strip()
-                io_type = str(row.get('收/支', '')).strip()
-                amount_str = str(row.get('金额', '0')).strip()
-                status = str(row.get('交易状态', '')).strip()
-
-                # 跳过无效数据
-                if not date_str or date_str == 'nan' or '交易时间' in date_str:
-                    continue
-
-                # 跳过不成功的交易
-                if '成功' not in status:
-                    continue
-
-                # 跳过"不计收支"
-                if '不计' in io_type:
-                    continue
-
-                # 解析金额
-                try:
-                    amount = float(amount_str.replace(',', ''))
-                except:
-                    continue
-
-                # 跳过0金额
-                if amount == 0:
-                    continue
-
-                # 解析日期
-                try:
-                    dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-                except:
-                    continue
-
-                # 判断收支类型
-                is_income = '收入' in io_type
-
-                # 使用智能分类器
-                mapped_category = SmartCategorizer.categorize(
-                    'alipay', category, counterparty, is_income
-                )
-
-                # 生成智能备注
-                note = SmartCategorizer.generate_note(
-                    category, counterparty, mapped_category
-                )
-
-                # 返回飞书表格式
-                records.append({
-                    "备注": note[:50],
-                    "日期": int(dt.timestamp() * 1000),
-                    "收支": '收入' if is_income else '支出',
-                    "分类": mapped_category,
-                    "金额": amount,
-                    "交易对方": SmartCategorizer._clean_counterparty(counterparty)[:50] # 添加原始交易对方, 并做基础清理
-                })
-
-            except Exception as e:
-                continue
-
-        return records
+        # usecols只解析需要的列, dtype=str + na_filter=False 跳过类型推断
+        df = pd.read_csv(
+            filename, encoding='gbk', skiprows=24, engine='c',
+            usecols=lambda col: col in AlipayParser._COLUMN_SET,
+            dtype=str, na_filter=False
+        )
+
+        # 补齐缺失的列,避免旧版账单格式差异导致KeyError
+        for col in AlipayParser.COLUMNS:
+            if col not in df.columns:
+                df[col] = ''
+
+        df = df[AlipayParser.COLUMNS]
+        for col in AlipayParser.COLUMNS:
+            df[col] = df[col].str.strip()
+
+        # 列级转换: 金额和日期,非法值统一coerce成NaN后过滤
+        amount = pd.to_numeric(df['金额'].str.replace(',', ''), errors='coerce')
+        dates = pd.to_datetime(df['交易时间'], format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True)
+
+        # 布尔掩码过滤:
+        # - 只保留成功交易
+        # - 跳过"不计收支"
+        # - 跳过金额非法/为0的记录
+        # - 跳过日期非法的记录(含表头残留行)
+        mask = (
+            df['交易状态'].str.contains('成功', na=False)
+            & ~df['收/支'].str.contains('不计', na=False)
+            & amount.notna()
+            & (amount != 0)
+            & dates.notna()
+        )
+
+        df = df[mask]
+        amount = amount[mask]
+        ts_ms = BillParser._timestamps_ms(dates[mask])
+        is_income = df['收/支'].str.contains('收入')
+
+        return BillParser._build_records('alipay', df, amount, ts_ms, is_income)
 
 
 class WechatParser:
     """微信账单解析器"""
 
+    # 解析所需的列 (金额列读入后重命名为'金额',分类列重命名为'交易分类')
+    COLUMNS = ['交易时间', '交易类型', '交易对方', '收/支', '金额(元)', '当前状态']
+    _COLUMN_SET = frozenset(COLUMNS)
+
+    # 视为成功的交易状态 (frozenset保证O(1)成员判断, isin在C层构建哈希掩码)
+    VALID_STATUS = frozenset([
+        '支付成功', '已收钱', '对方已收钱', '对方已退还', '已全额退款', '已退款'
+    ])
+
     @staticmethod
     def parse(filename):
-        """解析微信账单XLSX (跳过前16行)"""
-        records = []
-
+        """解析微信账单XLSX (跳过前16行,列级向量化处理)"""
         try:
             # 读取Excel,跳过前16行
-            df = pd.read_excel(filename, skiprows=16)
-
-            for _, row in df.iterrows():
-                try:
-                    # 提取字段
-                    date_str = str(row.get('交易时间', '')).strip()
-                    category = str(row.get('交易类型', '')).strip()
-                    counterparty = str(row.get('交易对方', '')).strip()
-                    io_type = str(row.get('收/支', '')).strip()
-                    amount_str = str(row.get('金额(元)', '0')).strip()
-                    status = str(row.get('当前状态', '')).strip()
-
-                    # 跳过无效数据
-                    if not date_str or date_str == 'nan' or '交易时间' in date_str:
-                        continue
-
-                    # 跳过不成功的交易
-                    if status not in ['支付成功', '已收钱', '对方已收钱', '对方已退还', '已全额退款', '已退款']:
-                        continue
-
-                    # 跳过中性交易
-                    if '/' in io_type or io_type == 'nan' or not io_type:
-                        continue
-
-                    # 解析金额
-                    try:
-                        amount = float(amount_str.replace('¥', '').replace(',', ''))
-                    except:
-                        continue
-
-                    # 跳过0金额
-                    if amount == 0:
-                        continue
-
-                    # 解析日期
-                    try:
-                        dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        continue
-
-                    # 判断收支类型
-                    is_income = '收入' in io_type
-
-                    # 使用智能分类器
-                    mapped_category = SmartCategorizer.categorize(
-                        'wechat', category, counterparty, is_income
-                    )
-
-                    # 生成智能备注
-                    note = SmartCategorizer.generate_note(
-                        category, counterparty, mapped_category
-                    )
-
-                    # 返回飞书表格式
-                    records.append({
-                        "备注": note[:50],
-                        "日期": int(dt.timestamp() * 1000),
-                        "收支": '收入' if is_income else '支出',
-                        "分类": mapped_category,
-                        "金额": amount,
-                        "交易对方": SmartCategorizer._clean_counterparty(counterparty)[:50] # 添加原始交易对方
-                    })
-
-                except Exception as e:
-                    continue
+            # usecols只解析需要的列, dtype=str + na_filter=False 跳过类型推断
+            df = pd.read_excel(
+                filename, skiprows=16, engine='openpyxl',
+                usecols=lambda col: col in WechatParser._COLUMN_SET,
+                dtype=str, na_filter=False
+            )
+
+            # 补齐缺失的列,避免账单格式差异导致KeyError
+            for col in WechatParser.COLUMNS:
+                if col not in df.columns:
+                    df[col] = ''
+
+            df = df[WechatParser.COLUMNS]
+            for col in WechatParser.COLUMNS:
+                df[col] = df[col].str.strip()
+
+            # 统一列名,便于复用组装逻辑
+            df = df.rename(columns={'交易类型': '交易分类', '金额(元)': '金额'})
+
+            # 列级转换: 金额(去除¥和千分位)和日期
+            amount = pd.to_numeric(
+                df['金额'].str.replace('¥', '').str.replace(',', ''),
+                errors='coerce'
+            )
+            dates = pd.to_datetime(df['交易时间'], format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True)
+
+            # 布尔掩码过滤:
+            # - 只保留成功状态
+            # - 跳过中性交易(收/支为'/'或空)
+            # - 跳过金额非法/为0的记录
+            # - 跳过日期非法的记录(含表头残留行)
+            mask = (
+                df['当前状态'].isin(WechatParser.VALID_STATUS)
+                & ~df['收/支'].str.contains('/', na=False)
+                & (df['收/支'] != '')
+                & amount.notna()
+                & (amount != 0)
+                & dates.notna()
+            )
+
+            df = df[mask]
+            amount = amount[mask]
+            ts_ms = BillParser._timestamps_ms(dates[mask])
+            is_income = df['收/支'].str.contains('收入')
+
+            return BillParser._build_records('wechat', df, amount, ts_ms, is_income)
 
         except Exception as e:
             raise Exception(f"读取微信账单失败: {e}")
-
-        return records
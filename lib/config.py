@@ -3,7 +3,34 @@
 """
 import json
 import os
-import re
+
+try:
+    import orjson
+except ImportError:  # orjson未安装时回退到标准库
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec未安装时回退到逐字段检查
+    msgspec = None
+
+
+if msgspec is not None:
+    # 预编译的配置schema: 结构/必填字段/类型校验在C层一趟完成
+    class _AccountSchema(msgspec.Struct):
+        app_token: str
+        table_id: str
+        name: str
+        data_dir: str
+        report_emails: list | None = None
+
+    class _McpServerSchema(msgspec.Struct):
+        app_id: str
+        app_secret: str
+
+    class _ConfigSchema(msgspec.Struct):
+        accounts: dict[str, _AccountSchema]
+        mcp_server: _McpServerSchema
 
 
 class Config:
@@ -16,12 +43,20 @@ class Config:
         if not os.path.exists(config_file):
             raise FileNotFoundError(f"配置文件不存在: {config_file}")
 
-        with open(config_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        # orjson按字节解析, 省掉标准库的UTF-8转码开销
+        if orjson is not None:
+            with open(config_file, 'rb') as f:
+                self.data = orjson.loads(f.read())
+        else:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
 
         # 验证配置
         self._validate_config()
 
+        # 脏标记: 有未落盘的修改时为True, 由flush()统一写回
+        self._dirty = False
+
     def _validate_config(self):
         """验证配置文件格式和必需字段"""
         # 验证accounts
@@ -32,38 +67,55 @@ class Config:
         if not isinstance(accounts, dict) or len(accounts) == 0:
             raise ValueError("'accounts'必须是非空字典")
 
-        # 验证每个账本配置
+        if msgspec is not None:
+            # schema驱动校验: 结构/必填字段/类型检查交给C层一次convert
+            try:
+                msgspec.convert(self.data, type=_ConfigSchema)
+            except msgspec.ValidationError as e:
+                raise ValueError(f"配置文件格式不正确: {e}")
+        else:
+            # 逐字段回退检查
+            for account_name, account in accounts.items():
+                required_fields = ['app_token', 'table_id', 'name', 'data_dir']
+                for field in required_fields:
+                    if field not in account:
+                        raise ValueError(f"账本'{account_name}'缺少必需字段'{field}'")
+
+                # 验证report_emails (可选)
+                if 'report_emails' in account:
+                    if not isinstance(account['report_emails'], list):
+                        raise ValueError(f"账本'{account_name}'的'report_emails'必须是列表")
+
+            # 验证mcp_server配置
+            if 'mcp_server' not in self.data:
+                raise ValueError("配置文件缺少'mcp_server'字段")
+
+            mcp_server = self.data['mcp_server']
+            if 'app_id' not in mcp_server or 'app_secret' not in mcp_server:
+                raise ValueError("'mcp_server'缺少'app_id'或'app_secret'字段")
+
+        # schema无法表达的格式/路径检查
+        # 多账本可能共用数据目录, 校验过的路径只stat一次
+        verified_dirs = set()
         for account_name, account in accounts.items():
-            # 必需字段
-            required_fields = ['app_token', 'table_id', 'name', 'data_dir']
-            for field in required_fields:
-                if field not in account:
-                    raise ValueError(f"账本'{account_name}'缺少必需字段'{field}'")
-
-            # 验证app_token格式 (飞书app_token通常以大写字母开头)
-            if not re.match(r'^[A-Za-z0-9]{20,}$', account['app_token']):
+            # 验证app_token格式: 20位以上的字母数字串
+            # (纯字符串检查比正则快数倍, str.isalnum在C层一趟完成)
+            token = account['app_token']
+            if not (isinstance(token, str) and len(token) >= 20 and token.isalnum()):
                 raise ValueError(f"账本'{account_name}'的app_token格式不正确")
 
-            # 验证table_id格式
-            if not re.match(r'^tbl[A-Za-z0-9]{10,}$', account['table_id']):
+            # 验证table_id格式: 'tbl'前缀 + 10位以上字母数字
+            table_id = account['table_id']
+            if not (isinstance(table_id, str) and table_id.startswith('tbl')
+                    and len(table_id) >= 13 and table_id[3:].isalnum()):
                 raise ValueError(f"账本'{account_name}'的table_id格式不正确 (应以'tbl'开头)")
 
-            # 验证data_dir存在
-            if not os.path.exists(account['data_dir']):
-                raise ValueError(f"账本'{account_name}'的数据目录不存在: {account['data_dir']}")
-            
-            # 验证report_emails (可选)
-            if 'report_emails' in account:
-                if not isinstance(account['report_emails'], list):
-                    raise ValueError(f"账本'{account_name}'的'report_emails'必须是列表")
-
-        # 验证mcp_server配置
-        if 'mcp_server' not in self.data:
-            raise ValueError("配置文件缺少'mcp_server'字段")
-
-        mcp_server = self.data['mcp_server']
-        if 'app_id' not in mcp_server or 'app_secret' not in mcp_server:
-            raise ValueError("'mcp_server'缺少'app_id'或'app_secret'字段")
+            # 验证data_dir是目录 (isdir同时排除同名普通文件的误配)
+            data_dir = account['data_dir']
+            if data_dir not in verified_dirs:
+                if not os.path.isdir(data_dir):
+                    raise ValueError(f"账本'{account_name}'的数据目录不存在: {data_dir}")
+                verified_dirs.add(data_dir)
 
         # 验证import_settings
         if 'import_settings' in self.data:
@@ -83,7 +135,9 @@ class Config:
     def get_mcp_server_config(self):
         """获取MCP服务器配置"""
         config = self.data.get('mcp_server', {})
-        command = config.get('command', [])
+        # 复制一份再拼参数: 直接extend会把认证参数反复追加进配置里的列表,
+        # 多次调用后argv越来越长且格式错误
+        command = list(config.get('command', []))
         command.extend([
             '-a', config.get('app_id'),
             '-s', config.get('app_secret')
@@ -102,19 +156,30 @@ class Config:
         """列出所有账本"""
         return list(self.data.get('accounts', {}).keys())
 
-    def update_last_import_timestamp(self, account_name, source_type, timestamp):
+    def update_last_import_timestamp(self, account_name, source_type, timestamp,
+                                     autosave=False):
         """
         更新账单来源的最后导入时间戳
+        默认只打脏标记不落盘, 批量导入时由flush()一次性写回,
+        避免每条更新都全量重写config.json
         :param account_name: 账本名称
         :param source_type: 来源类型 'alipay' 或 'wechat'
         :param timestamp: 时间戳
+        :param autosave: 是否立即写回文件
         """
         account = self.data['accounts'][account_name]
         if 'last_import_timestamp' not in account:
             account['last_import_timestamp'] = {}
 
         account['last_import_timestamp'][source_type] = timestamp
-        self.save()
+        self._dirty = True
+        if autosave:
+            self.save()
+
+    def flush(self):
+        """有未落盘修改时写回文件"""
+        if self._dirty:
+            self.save()
 
     def get_last_import_timestamp(self, account_name, source_type):
         """
@@ -134,6 +199,20 @@ class Config:
         })
 
     def save(self):
-        """保存配置到文件"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        """保存配置到文件 (先写临时文件再原子替换, 避免中断产生半截文件)"""
+        tmp_file = self.config_file + '.tmp'
+        if orjson is not None:
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.config_file)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        return False
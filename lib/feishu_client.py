@@ -3,23 +3,212 @@
 用于批量操作
 """
 import requests
+import itertools
 import json
+import os
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # orjson未安装时回退到标准库
+    orjson = None
+
+try:
+    import ijson  # 大响应流式解析 (自动选择可用的最快后端, 如yajl2_c)
+except ImportError:
+    ijson = None
+
+
+def json_dumps_bytes(obj):
+    """序列化为UTF-8字节 (优先orjson, 批量payload上比标准库快2-5倍)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data):
+    """反序列化JSON字节/字符串 (优先orjson)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# 按值的精确类型分发 (飞书字段响应是json反序列化出来的精确类型,
+# 查表代替isinstance链, 省掉热循环里的逐个类型判断)
+_FIELD_TEXT_DISPATCH = {
+    str: lambda v: v,
+    list: lambda v: parse_field_text(v[0]) if v else '',
+    dict: lambda v: str(v.get('text', '')),
+}
+
+
+def parse_field_text(v):
+    """
+    提取飞书字段的文本值
+    兼容纯字符串、富文本片段列表 [{'text': ...}] 和单个片段dict
+    :param v: 字段原始值
+    :return: 文本字符串
+    """
+    handler = _FIELD_TEXT_DISPATCH.get(type(v))
+    if handler is not None:
+        return handler(v)
+    return str(v) if v else ''
+
+
+def _chunked(seq, n):
+    """按固定大小切块任意可迭代对象, 一次只物化一个块"""
+    it = iter(seq)
+    while True:
+        chunk = list(itertools.islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_records_response(response):
+    """
+    解析记录类响应 (list_records/search_records)
+    装了ijson时对response.raw做单遍流式解析, 记录边到边组装,
+    不等整个payload落地、也不构建中间的完整JSON树;
+    否则回退到一次性反序列化
+    :param response: requests响应对象 (需以stream=True发起)
+    :return: (code, msg, items, has_more, page_token)
+    """
+    if ijson is None:
+        result = json_loads(response.content)
+        data = result.get("data", {}) or {}
+        return (
+            result.get("code"),
+            result.get("msg"),
+            data.get("items", []),
+            data.get("has_more", False),
+            data.get("page_token"),
+        )
+
+    code = None
+    msg = None
+    items = []
+    has_more = False
+    page_token = None
+    builder = None
+
+    # requests默认协商gzip, 但stream模式下response.raw不会自动解压;
+    # 打开urllib3的透明解码, 否则ijson读到的是压缩字节流
+    response.raw.decode_content = True
+
+    for prefix, event, value in ijson.parse(response.raw):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == 'data.items.item' and event == 'end_map':
+                items.append(builder.value)
+                builder = None
+        elif prefix == 'data.items.item' and event == 'start_map':
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == 'code':
+            code = value
+        elif prefix == 'msg':
+            msg = value
+        elif prefix == 'data.has_more':
+            has_more = value
+        elif prefix == 'data.page_token':
+            page_token = value
+
+    return code, msg, items, has_more, page_token
 
 
 class FeishuClient:
     """飞书API客户端"""
 
-    def __init__(self, app_id, app_secret):
+    # 同一张表的并发写入上限 (飞书对单表写入有并发/频率限制)
+    TABLE_WRITE_CONCURRENCY = 3
+
+    # batch_create/batch_update单次请求的记录数上限 (飞书API限制)
+    MAX_BATCH = 500
+
+    # 按 (app_token, table_id) 维护写入信号量,保证并发上传时单表不超限
+    _table_semaphores = {}
+    _table_semaphores_lock = threading.Lock()
+
+    @classmethod
+    def _table_semaphore(cls, app_token, table_id):
+        """获取指定表的写入信号量"""
+        key = (app_token, table_id)
+        with cls._table_semaphores_lock:
+            semaphore = cls._table_semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.Semaphore(cls.TABLE_WRITE_CONCURRENCY)
+                cls._table_semaphores[key] = semaphore
+            return semaphore
+
+    def __init__(self, app_id, app_secret, max_retries=3, backoff_cap=8):
         """
         初始化客户端
         :param app_id: 应用ID
         :param app_secret: 应用密钥
+        :param max_retries: API调用默认重试次数
+        :param backoff_cap: 退避等待上限(秒)
         """
         self.app_id = app_id
         self.app_secret = app_secret
+        self.max_retries = max_retries
+        self.backoff_cap = backoff_cap
         self.access_token = None
         self.token_expire_time = 0  # Token过期时间戳
+        self._fields_cache = {}  # (app_token, table_id) -> 字段列表
+        self._cached_headers = None  # token对应的共享请求头
+        self._cached_header_token = None
+
+        # 复用TCP/TLS连接 (批量调用时省掉逐请求的握手开销)
+        # 重试由_api_call_with_retry处理, adapter层不再重试
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, max_retries=0
+        )
+        self.session.mount('https://', adapter)
+
+        # fallback逐条创建/多批次并发用的线程池
+        # (纯I/O等待, 并发度受单表信号量和限流闸门约束)
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        # 限流闸门: 命中限流错误码后置位, 新请求先退避再清除
+        self._throttle = threading.Event()
+
+    def close(self):
+        """关闭线程池和底层连接池"""
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def _token_cache_file(self):
+        """token持久化文件路径 (按app_id区分)"""
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'lark_wallet')
+        return os.path.join(cache_dir, f'token_{self.app_id}.json')
+
+    def _load_cached_token(self):
+        """从本地缓存文件恢复未过期的token (CLI短进程省掉一次认证往返)"""
+        try:
+            with open(self._token_cache_file(), 'rb') as f:
+                cached = json_loads(f.read())
+            self.access_token = cached['token']
+            self.token_expire_time = cached['expire_time']
+        except (OSError, ValueError, KeyError):
+            pass  # 缓存缺失/损坏时走正常获取流程
+
+    def _save_cached_token(self):
+        """token写回本地缓存 (0600权限, 临时文件+原子替换)"""
+        try:
+            cache_file = self._token_cache_file()
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            data = {'token': self.access_token, 'expire_time': self.token_expire_time}
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json_dumps_bytes(data))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass  # 缓存写失败不影响正常调用
 
     def get_tenant_access_token(self):
         """获取tenant_access_token,带过期检查和自动刷新"""
@@ -28,6 +217,11 @@ class FeishuClient:
         if self.access_token and current_time < (self.token_expire_time - 300):
             return self.access_token
 
+        # 先查本地持久化缓存, 跨进程复用未过期的token
+        self._load_cached_token()
+        if self.access_token and current_time < (self.token_expire_time - 300):
+            return self.access_token
+
         url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
         headers = {"Content-Type": "application/json"}
         data = {
@@ -35,8 +229,8 @@ class FeishuClient:
             "app_secret": self.app_secret
         }
 
-        response = requests.post(url, headers=headers, json=data)
-        result = response.json()
+        response = self.session.post(url, headers=headers, json=data)
+        result = json_loads(response.content)
 
         if result.get("code") != 0:
             raise Exception(f"获取access_token失败: {result}")
@@ -46,31 +240,75 @@ class FeishuClient:
         expire_seconds = result.get("expire", 7200)
         self.token_expire_time = current_time + expire_seconds
 
+        # 持久化供后续进程复用
+        self._save_cached_token()
+
         return self.access_token
 
-    def _api_call_with_retry(self, url, headers, data, method='POST', max_retries=3, timeout=30):
+    def _auth_headers(self):
+        """
+        带认证的请求头 (按token缓存同一个字典)
+        fallback逐条路径每条记录都要请求头, 这里把O(N)次
+        f-string拼接和字典分配降到每次token刷新一次
+        """
+        token = self.get_tenant_access_token()
+        if token != self._cached_header_token:
+            self._cached_headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            }
+            self._cached_header_token = token
+        return self._cached_headers
+
+    def _backoff_seconds(self, attempt, response=None):
+        """
+        计算重试等待时间
+        优先尊重服务端的Retry-After头; 否则用带满抖动的指数退避
+        (random.uniform打散并发worker的重试节奏, 避免同时再次撞限流)
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_cap)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_cap, 2 ** attempt))
+
+    def _api_call_with_retry(self, url, headers, data, method='POST', max_retries=None, timeout=30):
         """
         带重试的API调用
         :param url: API URL
         :param headers: 请求头
         :param data: 请求体
         :param method: HTTP方法 (POST, PUT, DELETE等)
-        :param max_retries: 最大重试次数
+        :param max_retries: 最大重试次数 (默认取self.max_retries)
         :param timeout: 超时时间
         :return: API响应结果
         """
+        if max_retries is None:
+            max_retries = self.max_retries
+
+        method = method.upper()
+
+        # 请求体在重试循环外只序列化一次
+        # (orjson直接产出UTF-8字节, 跳过requests内部json.dumps+encode两趟)
+        body_bytes = None
+        if method != 'GET' and data is not None:
+            body_bytes = json_dumps_bytes(data)
+
         for attempt in range(max_retries):
             try:
-                if method.upper() == 'GET':
-                    response = requests.get(url, headers=headers, params=data, timeout=timeout)
-                elif method.upper() == 'PUT':
-                    response = requests.put(url, headers=headers, json=data, timeout=timeout)
-                elif method.upper() == 'DELETE':
-                    response = requests.delete(url, headers=headers, json=data, timeout=timeout)
+                if method == 'GET':
+                    response = self.session.get(url, headers=headers, params=data, timeout=timeout)
+                elif method == 'PUT':
+                    response = self.session.put(url, headers=headers, data=body_bytes, timeout=timeout)
+                elif method == 'DELETE':
+                    response = self.session.delete(url, headers=headers, data=body_bytes, timeout=timeout)
                 else:
-                    response = requests.post(url, headers=headers, json=data, timeout=timeout)
+                    response = self.session.post(url, headers=headers, data=body_bytes, timeout=timeout)
 
-                result = response.json()
+                result = json_loads(response.content)
 
                 # 检查是否需要重试
                 code = result.get("code", 0)
@@ -82,8 +320,7 @@ class FeishuClient:
                 # 限流错误,需要重试
                 if code in [99991400, 99991664]:  # 飞书限流错误码
                     if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt)  # 指数退避: 1s, 2s, 4s
-                        time.sleep(wait_time)
+                        time.sleep(self._backoff_seconds(attempt, response))
                         continue
 
                 # 其他错误,不重试
@@ -91,14 +328,12 @@ class FeishuClient:
 
             except requests.exceptions.Timeout:
                 if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt)
-                    time.sleep(wait_time)
+                    time.sleep(self._backoff_seconds(attempt))
                     continue
                 raise
             except requests.exceptions.RequestException as e:
                 if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt)
-                    time.sleep(wait_time)
+                    time.sleep(self._backoff_seconds(attempt))
                     continue
                 raise
 
@@ -115,18 +350,16 @@ class FeishuClient:
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create"
 
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}",
-            "Content-Type": "application/json"
-        }
+        headers = self._auth_headers()
 
         data = {
             "records": records
         }
 
         try:
-            # 使用带重试的API调用
-            result = self._api_call_with_retry(url, headers, data)
+            # 使用带重试的API调用 (信号量限制同表并发写入)
+            with self._table_semaphore(app_token, table_id):
+                result = self._api_call_with_retry(url, headers, data)
 
             if result.get("code") != 0:
                 # API调用失败
@@ -151,36 +384,81 @@ class FeishuClient:
             print(f"批量创建异常: {e}")
             return self._fallback_single_create(app_token, table_id, records)
 
+    def _create_one(self, app_token, table_id, index, record):
+        """
+        创建单条记录 (fallback路径, 线程池内执行)
+        :return: (是否成功, 错误信息或None)
+        """
+        # 限流闸门置位时先退避, 避免并发请求继续撞限流
+        if self._throttle.is_set():
+            time.sleep(1)
+            self._throttle.clear()
+
+        try:
+            url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records"
+            headers = self._auth_headers()
+
+            # 单条创建也使用重试机制
+            result = self._api_call_with_retry(url, headers, {"fields": record["fields"]}, max_retries=2, timeout=10)
+
+            if result.get("code") == 0:
+                return True, None
+            if result.get("code") in (99991400, 99991664):
+                self._throttle.set()
+            return False, f"记录{index}: {result.get('msg', 'unknown error')}"
+        except Exception as e:
+            return False, f"记录{index}: {str(e)}"
+
     def _fallback_single_create(self, app_token, table_id, records):
         """
         逐条创建记录(批量失败时的fallback)
+        在当前线程内串行执行: fallback经常从executor的worker里触发
+        (batch_create_records_many的批次失败时), 再往同一个池里提交
+        并阻塞等结果, 批量失败的批次一多所有worker就会互相等死;
+        批次间的并发已由上层保证
         """
         success = 0
         failed = 0
         errors = []
 
-        for i, record in enumerate(records):
-            try:
-                url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records"
-                headers = {
-                    "Authorization": f"Bearer {self.get_tenant_access_token()}",
-                    "Content-Type": "application/json"
-                }
-
-                # 单条创建也使用重试机制
-                result = self._api_call_with_retry(url, headers, {"fields": record["fields"]}, max_retries=2, timeout=10)
-
-                if result.get("code") == 0:
-                    success += 1
-                else:
-                    failed += 1
-                    errors.append(f"记录{i}: {result.get('msg', 'unknown error')}")
-            except Exception as e:
+        for index, record in enumerate(records):
+            ok, error = self._create_one(app_token, table_id, index, record)
+            if ok:
+                success += 1
+            else:
                 failed += 1
-                errors.append(f"记录{i}: {str(e)}")
+                errors.append(error)
 
         return {"success": success, "failed": failed, "errors": errors}
 
+    def batch_create_all(self, app_token, table_id, records, batch_size=MAX_BATCH):
+        """
+        把任意大小的记录集合切块后全部创建
+        records可以是生成器: 切块流式进行, 峰值内存只有一个批次
+        :param records: 记录可迭代对象, 每条格式: {"fields": {...}}
+        :param batch_size: 每批大小 (飞书上限500)
+        :return: 汇总结果 {"success": int, "failed": int, "errors": list}
+        """
+        total = {"success": 0, "failed": 0, "errors": []}
+        for chunk in _chunked(records, batch_size):
+            result = self.batch_create_records(app_token, table_id, chunk)
+            total["success"] += result.get("success", 0)
+            total["failed"] += result.get("failed", 0)
+            total["errors"].extend(result.get("errors", []))
+        return total
+
+    def batch_create_records_many(self, app_token, table_id, chunks):
+        """
+        并发提交多个批次的batch_create
+        (单表并发仍受_table_semaphore限制)
+        :param chunks: 批次列表, 每个批次是records列表
+        :return: 与chunks等长的结果列表
+        """
+        return list(self.executor.map(
+            lambda chunk: self.batch_create_records(app_token, table_id, chunk),
+            chunks
+        ))
+
     def batch_update_records(self, app_token, table_id, records):
         """
         批量更新记录
@@ -191,29 +469,46 @@ class FeishuClient:
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update"
 
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}",
-            "Content-Type": "application/json"
-        }
+        headers = self._auth_headers()
 
         data = {
             "records": records
         }
 
         try:
-            # 使用带重试的API调用
-            result = self._api_call_with_retry(url, headers, data)
+            # 使用带重试的API调用 (信号量限制同表并发写入)
+            with self._table_semaphore(app_token, table_id):
+                result = self._api_call_with_retry(url, headers, data)
 
             if result.get("code") != 0:
-                # 如果批量更新失败,尝试逐条更新
-                return self._fallback_single_update(app_token, table_id, records)
+                # 批量失败先对半拆分重试, 把问题记录收敛到小批次,
+                # 而不是直接退化成N次逐条PUT
+                return self._halving_update(app_token, table_id, records)
 
             return {"success": len(records), "failed": 0, "errors": []}
 
         except Exception as e:
-            # 网络错误等,尝试逐条更新
+            # 网络错误等,同样走拆分重试
+            return self._halving_update(app_token, table_id, records)
+
+    def _halving_update(self, app_token, table_id, records):
+        """
+        批量更新失败后的对半拆分重试
+        超限/个别脏记录导致整批被拒时, 拆成两半分别重走batch_update,
+        只有缩到50条以内仍失败的批次才逐条更新
+        """
+        if len(records) <= 50:
             return self._fallback_single_update(app_token, table_id, records)
 
+        mid = len(records) // 2
+        total = {"success": 0, "failed": 0, "errors": []}
+        for half in (records[:mid], records[mid:]):
+            result = self.batch_update_records(app_token, table_id, half)
+            total["success"] += result.get("success", 0)
+            total["failed"] += result.get("failed", 0)
+            total["errors"].extend(result.get("errors", []))
+        return total
+
     def _fallback_single_update(self, app_token, table_id, records):
         """
         逐条更新记录(批量失败时的fallback)
@@ -231,10 +526,7 @@ class FeishuClient:
                     continue
 
                 url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}"
-                headers = {
-                    "Authorization": f"Bearer {self.get_tenant_access_token()}",
-                    "Content-Type": "application/json"
-                }
+                headers = self._auth_headers()
 
                 # 单条更新使用PUT方法
                 result = self._api_call_with_retry(url, headers, {"fields": record["fields"]}, method='PUT', max_retries=2, timeout=10)
@@ -250,32 +542,48 @@ class FeishuClient:
 
         return {"success": success, "failed": failed, "errors": errors}
 
-    def list_fields(self, app_token, table_id):
+    def batch_update_records_many(self, app_token, table_id, chunks):
         """
-        列出表字段
+        并发提交多个批次的batch_update
+        每个批次一个完整RTT, 串行提交时耗时是批次数x RTT;
+        放进共享线程池后在途请求重叠, 同表并发仍受_table_semaphore限制
+        :param chunks: 批次列表, 每个批次是records列表
+        :return: 与chunks等长的结果列表
+        """
+        return list(self.executor.map(
+            lambda chunk: self.batch_update_records(app_token, table_id, chunk),
+            chunks
+        ))
+
+    def list_fields(self, app_token, table_id, use_cache=True):
+        """
+        列出表字段 (结果按 (app_token, table_id) 缓存,表结构变更后可传use_cache=False强制刷新)
         :param app_token: 多维表app_token
         :param table_id: 表table_id
+        :param use_cache: 是否使用缓存
         :return: 字段列表
         """
+        cache_key = (app_token, table_id)
+        if use_cache and cache_key in self._fields_cache:
+            return self._fields_cache[cache_key]
+
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/fields"
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}"
-        }
+        headers = self._auth_headers()
 
-        # 使用分页遍历所有字段
+        # 使用分页遍历所有字段 (复用同一个params字典, 仅翻页时更新token)
         all_fields = []
         page_token = None
         has_more = True
+        params = {"page_size": 100}
 
         while has_more:
-            params = {"page_size": 100}
             if page_token:
                 params["page_token"] = page_token
 
             # GET 请求不带 body, 这里的 _api_call_with_retry 需要调整一下或者直接用 requests
             # 为简单起见，且 list_fields 通常不需要重试太多次，直接用 requests
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            result = response.json()
+            response = self.session.get(url, headers=headers, params=params, timeout=30)
+            result = json_loads(response.content)
 
             if result.get("code") != 0:
                 raise Exception(f"获取字段失败: {result}")
@@ -286,40 +594,75 @@ class FeishuClient:
             has_more = result.get("data", {}).get("has_more", False)
             page_token = result.get("data", {}).get("page_token")
 
+        self._fields_cache[cache_key] = all_fields
         return all_fields
 
-    def list_records(self, app_token, table_id, page_token=None, page_size=500):
+    def list_records(self, app_token, table_id, page_token=None, page_size=500,
+                     field_names=None):
         """
         列出记录
         :param app_token: 多维表app_token
         :param table_id: 表table_id
         :param page_token: 分页token
         :param page_size: 每页大小
+        :param field_names: 只返回这些字段 (None表示全部);
+            服务端裁列, 宽表下响应体和解析开销按比例缩小
         :return: (items, page_token, has_more)
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records"
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}"
-        }
+        headers = self._auth_headers()
         params = {
             "page_size": page_size
         }
         if page_token:
             params["page_token"] = page_token
+        if field_names:
+            # API要求JSON数组格式的字符串, 如 '["备注","分类"]'
+            params["field_names"] = json.dumps(field_names, ensure_ascii=False)
 
-        # GET 请求
-        response = requests.get(url, headers=headers, params=params, timeout=30)
-        result = response.json()
+        # GET 请求 (stream=True让流式解析直接消费socket缓冲)
+        response = self.session.get(url, headers=headers, params=params, timeout=30, stream=True)
+        code, msg, items, has_more, next_token = parse_records_response(response)
 
-        if result.get("code") != 0:
-            raise Exception(f"获取记录失败: {result}")
+        if code != 0:
+            raise Exception(f"获取记录失败: code={code}, msg={msg}")
 
-        data = result.get("data", {})
-        return (
-            data.get("items", []),
-            data.get("page_token"),
-            data.get("has_more", False)
-        )
+        return (items, next_token, has_more)
+
+    def iter_records(self, app_token, table_id, page_size=500, max_pages=None,
+                     field_names=None):
+        """
+        分页遍历记录,预取下一页
+        拿到当前页的page_token后立即在后台线程发起下一页请求,
+        让调用方处理当前页的时间与服务端往返重叠
+        :param app_token: 多维表app_token
+        :param table_id: 表table_id
+        :param page_size: 每页大小
+        :param max_pages: 最多拉取多少页 (None表示拉完)
+        :param field_names: 只返回这些字段 (透传给list_records)
+        :return: 生成器,每次yield一页记录列表
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self.list_records, app_token, table_id, None, page_size,
+                field_names
+            )
+            pages = 0
+
+            while future is not None:
+                items, page_token, has_more = future.result()
+                pages += 1
+
+                # 先调度下一页,再把当前页交给调用方
+                if has_more and page_token and (max_pages is None or pages < max_pages):
+                    future = executor.submit(
+                        self.list_records, app_token, table_id, page_token,
+                        page_size, field_names
+                    )
+                else:
+                    future = None
+
+                yield items
 
     def search_records(self, app_token, table_id, filter_conditions=None, sort=None, page_size=500, page_token=None):
         """
@@ -333,10 +676,7 @@ class FeishuClient:
         :return: 记录列表
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/search"
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}",
-            "Content-Type": "application/json"
-        }
+        headers = self._auth_headers()
 
         body = {
             "page_size": page_size
@@ -348,29 +688,26 @@ class FeishuClient:
         if sort:
             body["sort"] = sort
 
-        if page_token:
-            body["page_token"] = page_token
+        # 迭代翻页: 所有页直接追加进同一个列表,
+        # 不再递归产生每页一个栈帧和中间列表拷贝
+        items = []
+        while True:
+            if page_token:
+                body["page_token"] = page_token
+            else:
+                body.pop("page_token", None)
 
-        response = requests.post(url, headers=headers, json=body, timeout=30)
-        result = response.json()
+            response = self.session.post(url, headers=headers, data=json_dumps_bytes(body), timeout=30, stream=True)
+            code, msg, page_items, has_more, next_token = parse_records_response(response)
 
-        if result.get("code") != 0:
-            raise Exception(f"搜索记录失败: {result}")
-
-        data = result.get("data", {})
-        items = data.get("items", [])
-
-        # 如果有更多页,递归获取
-        if data.get("has_more", False) and data.get("page_token"):
-            next_items = self.search_records(
-                app_token,
-                table_id,
-                filter_conditions,
-                sort,
-                page_size,
-                data.get("page_token")
-            )
-            items.extend(next_items)
+            if code != 0:
+                raise Exception(f"搜索记录失败: code={code}, msg={msg}")
+
+            items.extend(page_items)
+
+            if not has_more or not next_token:
+                break
+            page_token = next_token
 
         return items
 
@@ -384,10 +721,7 @@ class FeishuClient:
         :return: 创建结果
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables"
-        headers = {
-            "Authorization": f"Bearer {self.get_tenant_access_token()}",
-            "Content-Type": "application/json"
-        }
+        headers = self._auth_headers()
 
         body = {
             "table": {
@@ -406,6 +740,35 @@ class FeishuClient:
         if result.get("code") != 0:
             raise Exception(f"创建表失败: {result}")
 
+        # 表结构发生变化, 使该多维表下的字段缓存失效
+        for key in [k for k in self._fields_cache if k[0] == app_token]:
+            del self._fields_cache[key]
+
         return result.get("data", {})
 
 
+# 进程级客户端缓存: 串联执行多个脚本入口时复用同一个实例,
+# 连带复用其连接池/线程池/字段缓存, 不重复初始化
+_CLIENTS = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(app_id, app_secret, **kwargs):
+    """
+    获取进程内共享的FeishuClient实例 (按凭据缓存)
+
+    共享实例不应调用close(), 线程池和连接池随进程退出回收
+    :param app_id: 应用ID
+    :param app_secret: 应用密钥
+    :param kwargs: 透传给FeishuClient的其余参数 (仅首次创建时生效)
+    :return: FeishuClient实例
+    """
+    key = (app_id, app_secret)
+    with _clients_lock:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = FeishuClient(app_id, app_secret, **kwargs)
+            _CLIENTS[key] = client
+        return client
+
+
@@ -1,36 +1,51 @@
 """
 日志模块
 """
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# 进程启动日期 (日志按天切文件, 进程内算一次即可)
+_LOG_DATE = datetime.now().strftime('%Y%m%d')
+
+# 已配置的日志器缓存: 循环中按账本反复调用时直接返回
+_loggers = {}
 
 
 def setup_logger(name='feishu_import', log_file=None):
     """
     设置日志器
+    日志经QueueHandler入队, 由后台QueueListener线程格式化并写盘,
+    调用线程不再被磁盘I/O阻塞; 文件delay=True, 首条日志前不占fd
     :param name: 日志器名称
     :param log_file: 日志文件路径,默认为logs/import_YYYYMMDD.log
     :return: logger对象
     """
+    cached = _loggers.get(name)
+    if cached is not None:
+        return cached
+
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
     # 避免重复添加handler
     if logger.handlers:
+        _loggers[name] = logger
         return logger
 
-    # 创建logs目录
+    # 创建logs目录 (exist_ok: 单个syscall, 已存在时是no-op)
     log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
 
     # 默认日志文件名
     if log_file is None:
-        log_file = os.path.join(log_dir, f"import_{datetime.now().strftime('%Y%m%d')}.log")
+        log_file = os.path.join(log_dir, f"import_{_LOG_DATE}.log")
 
-    # 文件handler
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    # 文件handler (delay=True: 到首条日志落盘时才打开文件)
+    file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
     file_handler.setLevel(logging.INFO)
 
     # 格式化
@@ -40,6 +55,22 @@ def setup_logger(name='feishu_import', log_file=None):
     )
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
+    # 队列中转: 调用方只做入队, 写文件在监听线程完成
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+
+    def _stop_listener():
+        # stop()不可重入, 已手动停止过则跳过
+        if listener._thread is not None:
+            listener.stop()
+
+    atexit.register(_stop_listener)
+
+    logger.addHandler(queue_handler)
+    # 保存在logger上, 需要提前停止时可调用logger._queue_listener.stop()
+    logger._queue_listener = listener
 
+    _loggers[name] = logger
     return logger
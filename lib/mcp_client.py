@@ -1,10 +1,16 @@
 """
 MCP客户端模块
 """
+import asyncio
 import json
 import subprocess
 import sys
 
+try:
+    import orjson
+except ImportError:  # orjson未安装时回退到标准库
+    orjson = None
+
 
 class MCPClient:
     """MCP客户端,通过stdio与MCP服务器通信"""
@@ -14,13 +20,13 @@ class MCPClient:
         初始化MCP客户端
         :param command: MCP服务器启动命令列表
         """
+        # 二进制管道: 省掉text=True的逐行UTF-8解码,
+        # 默认块缓冲也避免line-buffer在部分版本退化成逐字节读
         self.process = subprocess.Popen(
             command,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            stderr=subprocess.PIPE
         )
         self.request_id = 0
 
@@ -34,18 +40,24 @@ class MCPClient:
             "params": params or {}
         }
 
-        # 发送请求
-        request_json = json.dumps(request)
-        self.process.stdin.write(request_json + "\n")
+        # 发送请求 (orjson直接产出UTF-8字节)
+        if orjson is not None:
+            payload = orjson.dumps(request) + b"\n"
+        else:
+            payload = json.dumps(request).encode('utf-8') + b"\n"
+        self.process.stdin.write(payload)
         self.process.stdin.flush()
 
-        # 接收响应
+        # 接收响应 (字节行, 交给解析器处理编码)
         response_line = self.process.stdout.readline()
 
         if not response_line:
             raise Exception("MCP服务器无响应")
 
-        response = json.loads(response_line)
+        if orjson is not None:
+            response = orjson.loads(response_line)
+        else:
+            response = json.loads(response_line)
 
         if "error" in response:
             raise Exception(f"MCP错误: {response['error']}")
@@ -75,3 +87,108 @@ class MCPClient:
         if self.process.stdin:
             self.process.stdin.close()
         self.process.wait()
+
+
+class AsyncMCPClient:
+    """
+    异步MCP客户端
+    请求/响应按id匹配, 多个RPC可同时在途:
+    await asyncio.gather(client.call_tool(...), ...) 并发发起,
+    消除同步客户端逐条"写一行-等一行"的队头阻塞
+    """
+
+    def __init__(self):
+        self.process = None
+        self.request_id = 0
+        self._pending = {}  # id -> Future
+        self._reader_task = None
+
+    @classmethod
+    async def start(cls, command):
+        """
+        启动MCP服务器进程并建立通信
+        :param command: MCP服务器启动命令列表
+        :return: 就绪的客户端实例
+        """
+        client = cls()
+        client.process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        client._reader_task = asyncio.ensure_future(client._read_loop())
+        return client
+
+    async def _read_loop(self):
+        """后台读取stdout, 按响应id回填对应的Future"""
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                # 服务器退出, 所有在途请求置错
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(Exception("MCP服务器无响应"))
+                self._pending.clear()
+                return
+
+            if orjson is not None:
+                response = orjson.loads(line)
+            else:
+                response = json.loads(line)
+
+            future = self._pending.pop(response.get("id"), None)
+            if future is None or future.done():
+                continue
+            if "error" in response:
+                future.set_exception(Exception(f"MCP错误: {response['error']}"))
+            else:
+                future.set_result(response.get("result"))
+
+    async def send_request(self, method, params=None):
+        """发送JSON-RPC 2.0请求, 返回结果 (可多请求并发在途)"""
+        self.request_id += 1
+        request = {
+            "jsonrpc": "2.0",
+            "id": self.request_id,
+            "method": method,
+            "params": params or {}
+        }
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self.request_id] = future
+
+        if orjson is not None:
+            payload = orjson.dumps(request) + b"\n"
+        else:
+            payload = json.dumps(request).encode('utf-8') + b"\n"
+        self.process.stdin.write(payload)
+        await self.process.stdin.drain()
+
+        return await future
+
+    async def initialize(self):
+        """初始化MCP连接"""
+        return await self.send_request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {
+                "name": "feishu-batch-import",
+                "version": "1.0.0"
+            }
+        })
+
+    async def call_tool(self, tool_name, arguments):
+        """调用MCP工具"""
+        return await self.send_request("tools/call", {
+            "name": tool_name,
+            "arguments": arguments
+        })
+
+    async def close(self):
+        """关闭连接"""
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self.process.stdin:
+            self.process.stdin.close()
+        await self.process.wait()
@@ -0,0 +1,55 @@
+"""
+已导入记录缓存模块
+用SQLite持久化已成功推送到飞书的记录键,跨运行去重
+(时间戳水位线无法拦截同一毫秒的重复记录,这里做精确兜底)
+"""
+import hashlib
+import os
+import sqlite3
+
+
+class SentCache:
+    """已导入记录缓存 (基于SQLite)"""
+
+    def __init__(self, path):
+        """
+        初始化缓存
+        :param path: SQLite数据库文件路径
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sent_records (key BLOB PRIMARY KEY)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _digest(key):
+        """将记录键 (日期, 金额, 分类) 压缩为8字节摘要,控制缓存文件大小"""
+        raw = repr(key).encode('utf-8')
+        return hashlib.blake2b(raw, digest_size=8).digest()
+
+    def contains(self, key):
+        """检查记录键是否已导入"""
+        cursor = self.conn.execute(
+            "SELECT 1 FROM sent_records WHERE key = ?",
+            (self._digest(key),)
+        )
+        return cursor.fetchone() is not None
+
+    def add_many(self, keys):
+        """批量登记已导入的记录键"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO sent_records (key) VALUES (?)",
+            [(self._digest(key),) for key in keys]
+        )
+        self.conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
@@ -4,8 +4,14 @@
 """
 import json
 import os
+import pandas as pd
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:  # orjson未安装时回退到标准库
+    orjson = None
+
 class SmartCategorizer:
     """智能分类器"""
 
@@ -207,13 +213,15 @@ class SmartCategorizer:
             return
 
         try:
-            with open(cls.CORRECTIONS_FILE, 'r', encoding='utf-8') as f:
+            with open(cls.CORRECTIONS_FILE, 'rb') as f:
                 content = f.read()
                 if not content: # Handle empty file case
                     cls._corrections = {}
+                elif orjson is not None:
+                    cls._corrections = orjson.loads(content)
                 else:
                     cls._corrections = json.loads(content)
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, ValueError):
             print(f"Warning: {cls.CORRECTIONS_FILE} is malformed. Initializing empty corrections.")
             cls._corrections = {}
         except Exception as e:
@@ -224,8 +232,12 @@ class SmartCategorizer:
     def _save_corrections(cls):
         """保存修正数据到 corrections.json"""
         try:
-            with open(cls.CORRECTIONS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(cls._corrections, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                with open(cls.CORRECTIONS_FILE, 'wb') as f:
+                    f.write(orjson.dumps(cls._corrections, option=orjson.OPT_INDENT_2))
+            else:
+                with open(cls.CORRECTIONS_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(cls._corrections, f, ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"Error saving {cls.CORRECTIONS_FILE}: {e}")
 
@@ -240,6 +252,23 @@ class SmartCategorizer:
             cls._corrections[cleaned_counterparty] = final_category
             cls._save_corrections()
 
+    @classmethod
+    def add_corrections_batch(cls, pairs):
+        """
+        批量添加或更新修正记录,合并后只写一次磁盘。
+        适用于学习脚本等一次产生大量修正的场景。
+        :param pairs: {交易对方: 最终分类} 映射
+        """
+        changed = False
+        for counterparty, final_category in pairs.items():
+            cleaned_counterparty = cls._clean_counterparty(counterparty)
+            if cleaned_counterparty:
+                cls._corrections[cleaned_counterparty] = final_category
+                changed = True
+
+        if changed:
+            cls._save_corrections()
+
     @classmethod
     def categorize(cls, source_type, category, counterparty, is_income):
         """
@@ -301,6 +330,113 @@ class SmartCategorizer:
         # 6. 否则使用原始分类映射结果
         return mapped if mapped else '其他'
 
+    @classmethod
+    def categorize_batch(cls, source_type, categories, counterparties, incomes):
+        """
+        批量智能分类
+        一次调用处理整列数据,把修正表/映射表/关键词规则的查找提升到循环外,
+        避免逐条调用 categorize 时的重复属性查找和参数绑定开销
+        :param source_type: 来源类型 'alipay' 或 'wechat'
+        :param categories: 原始交易分类序列
+        :param counterparties: 交易对方序列
+        :param incomes: 是否收入的布尔序列
+        :return: 分类结果列表 (与输入等长)
+        """
+        # 提升到循环外的查找
+        corrections = cls._corrections
+        exact_map = cls.EXACT_MERCHANT_MAP
+        keyword_rules = cls.KEYWORD_RULES
+        income_keywords = keyword_rules.get('其他收入', [])
+        clean_counterparty = cls._clean_counterparty
+
+        if source_type == 'alipay':
+            category_map = cls.ALIPAY_CATEGORY_MAP
+        else:
+            category_map = cls.WECHAT_CATEGORY_MAP
+
+        results = []
+        append = results.append
+
+        for category, counterparty, is_income in zip(categories, counterparties, incomes):
+            # 1. 优先检查修正记录
+            cleaned = clean_counterparty(counterparty)
+            if cleaned and cleaned in corrections:
+                append(corrections[cleaned])
+                continue
+
+            # 收入类型单独处理
+            if is_income:
+                for keyword in income_keywords:
+                    if keyword in category or keyword in counterparty:
+                        append('其他收入')
+                        break
+                else:
+                    append('工作收入')
+                continue
+
+            # 2. 优先精确匹配交易对方
+            if counterparty in exact_map:
+                append(exact_map[counterparty])
+                continue
+
+            # 3. 尝试基于原始分类映射
+            mapped = None
+            for key, val in category_map.items():
+                if key in category:
+                    mapped = val
+                    break
+
+            # 4. 基于交易对方关键词进行二次分类
+            combined_text = f"{category} {counterparty}"
+            keyword_match = None
+            max_matches = 0
+
+            for cat, keywords in keyword_rules.items():
+                if cat == '其他收入':  # 跳过收入类
+                    continue
+
+                matches = sum(1 for kw in keywords if kw in combined_text)
+                if matches > max_matches:
+                    max_matches = matches
+                    keyword_match = cat
+
+            # 5. 如果关键词匹配置信度高,使用关键词分类
+            if max_matches >= 2 or (max_matches >= 1 and not mapped):
+                append(keyword_match)
+            else:
+                # 6. 否则使用原始分类映射结果
+                append(mapped if mapped else '其他')
+
+        return results
+
+    @classmethod
+    def generate_note_batch(cls, categories, counterparties, final_categories):
+        """
+        批量生成智能备注 (列级字符串操作, 与 generate_note 语义一致)
+        :param categories: 原始分类序列
+        :param counterparties: 交易对方序列
+        :param final_categories: 最终分类序列
+        :return: 备注Series (已截断到50字符, 与输入等长)
+        """
+        cats = pd.Series(list(categories), dtype=object)
+        finals = pd.Series(list(final_categories), dtype=object)
+
+        # 向量化版 _clean_counterparty + 15字符截断
+        cleaned = (
+            pd.Series(list(counterparties), dtype=object)
+            .str.split('(', n=1).str[0]
+            .str.split('（', n=1).str[0]
+            .str.replace('*', '', regex=False)
+            .str.strip()
+            .str.slice(0, 15)
+        )
+
+        # 组合备注: 最终分类-交易对方; 交易对方为空或等于原始分类时退回原始分类
+        notes = (finals + '-' + cleaned).where(
+            (cleaned != '') & (cleaned != cats), cats
+        )
+        return notes.str.slice(0, 50)
+
     @classmethod
     def generate_note(cls, category, counterparty, final_category):
         """
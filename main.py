@@ -3,38 +3,73 @@
 资产同步系统主程序
 使用 APScheduler 定时执行同步任务
 """
+import importlib.util
+import json
+import subprocess
 import sys
 import signal
+import threading
+from datetime import date, datetime, time, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Optional
 
-# 添加项目根目录到路径
+# 源码目录直跑时才把src/挂到路径上;
+# pip install -e .后包已在sys.path, 跳过插入让导入走正常的finder缓存
 project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root / 'src'))
+if importlib.util.find_spec('core') is None:
+    sys.path.insert(0, str(project_root / 'src'))
 
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from loguru import logger
 
 from core.config import Config
 from core.logger import setup_logger
-from schedulers.crypto_sync import sync_crypto
-from schedulers.fund_sync import sync_fund
-from schedulers.snapshot import create_daily_snapshot
-from schedulers.asset_distribution_sync import sync_asset_distribution
-from schedulers.daily_report import send_daily_report
-from schedulers.price_alert import check_price_alerts
-from schedulers.periodic_report import generate_weekly_report, generate_monthly_report
-from schedulers.monthly_report import send_monthly_report as send_financial_monthly_report
-from schedulers.milestone_alert import check_milestones
-from schedulers.holding_period_reminder import check_holding_periods
-from schedulers.sync_error_summary import generate_error_summary
-from schedulers.feishu_backup import sync_feishu_backup
-from schedulers.feishu_change_review import sync_feishu_change_review
-from schedulers.health_advisor import generate_health_advice
-from schedulers.weight_reminder import check_weight_reminder
-from utils.backup import create_backup
-from utils.alert import AlertManager
+
+# apscheduler/AlertManager按需导入: --task/--run-once的一次性调用
+# 不启动调度器, 不必为它们付冷启动导入成本
+
+
+def _resolve(module_name, func_name):
+    """按需导入scheduler模块并取出入口函数"""
+    import importlib
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+# --task参数到入口函数的映射: O(1)查表替代逐个elif比较,
+# 新增任务只需加一行, 且天然配合惰性导入
+TASKS = {
+    'crypto': ('schedulers.crypto_sync', 'sync_crypto'),
+    'fund': ('schedulers.fund_sync', 'sync_fund'),
+    'snapshot': ('schedulers.snapshot', 'create_daily_snapshot'),
+    'distribution': ('schedulers.asset_distribution_sync', 'sync_asset_distribution'),
+    'report': ('schedulers.daily_report', 'send_daily_report'),
+    'alert': ('schedulers.price_alert', 'check_price_alerts'),
+    'weekly': ('schedulers.periodic_report', 'generate_weekly_report'),
+    'monthly': ('schedulers.periodic_report', 'generate_monthly_report'),
+    'financial_report': ('schedulers.monthly_report', 'send_monthly_report'),
+    'milestone': ('schedulers.milestone_alert', 'check_milestones'),
+    'holding': ('schedulers.holding_period_reminder', 'check_holding_periods'),
+    'summary': ('schedulers.sync_error_summary', 'generate_error_summary'),
+    'health': ('schedulers.health_advisor', 'generate_health_advice'),
+    'weight_reminder': ('schedulers.weight_reminder', 'check_weight_reminder'),
+}
+
+
+TIMEZONE = 'Asia/Shanghai'
+
+
+def _cron_trigger(job_name, jitter=None, **cron):
+    """
+    预构建CronTrigger
+    触发器在注册时就完成解析, 配置写错(如minute: 99)当场报错并带上
+    任务名, 而不是在add_job内部抛一条不知道是哪个任务的异常
+    :param jitter: 触发时间随机抖动上限(秒)
+    """
+    from apscheduler.triggers.cron import CronTrigger
+
+    try:
+        return CronTrigger(timezone=TIMEZONE, jitter=jitter, **cron)
+    except ValueError as e:
+        raise ValueError(f"任务'{job_name}'的cron配置不正确: {e}")
 
 
 class AssetSyncService:
@@ -44,6 +79,53 @@ class AssetSyncService:
     管理定时任务,自动同步加密货币和基金数据
     """
 
+    # 常规cron任务表: (配置键, 任务id, 模块名, 函数名, 默认cron参数, 任务名)
+    # 配置结构相同的任务统一在循环里注册, 特殊任务(加密货币/财务月报/
+    # 数据库备份/健康建议)仍单独处理
+    # 入口函数按"模块名:函数名"惰性解析, 未启用的任务不导入对应模块,
+    # 省掉冷启动时17个scheduler模块(连带pandas/requests)的导入开销
+    JOBS = [
+        ('fund_sync', 'fund_sync',
+         'schedulers.fund_sync', 'sync_fund',
+         {'hour': 9, 'minute': 0}, '基金同步'),
+        ('snapshot', 'daily_snapshot',
+         'schedulers.snapshot', 'create_daily_snapshot',
+         {'hour': 0, 'minute': 0}, '每日快照'),
+        ('distribution_sync', 'distribution_sync',
+         'schedulers.asset_distribution_sync', 'sync_asset_distribution',
+         {'hour': 0, 'minute': 5}, '资产分布同步'),
+        ('daily_report', 'daily_report',
+         'schedulers.daily_report', 'send_daily_report',
+         {'hour': 9, 'minute': 30}, '每日报告'),
+        ('price_alert', 'price_alert',
+         'schedulers.price_alert', 'check_price_alerts',
+         {'hour': '*', 'minute': 5}, '价格波动告警'),
+        ('weekly_report', 'weekly_report',
+         'schedulers.periodic_report', 'generate_weekly_report',
+         {'day_of_week': 'mon', 'hour': 9, 'minute': 0}, '周报'),
+        ('monthly_report', 'monthly_report',
+         'schedulers.periodic_report', 'generate_monthly_report',
+         {'day': 1, 'hour': 9, 'minute': 0}, '资产月报'),
+        ('milestone_alert', 'milestone_alert',
+         'schedulers.milestone_alert', 'check_milestones',
+         {'hour': 0, 'minute': 10}, '净值里程碑检查'),
+        ('holding_period_reminder', 'holding_period_reminder',
+         'schedulers.holding_period_reminder', 'check_holding_periods',
+         {'hour': 10, 'minute': 0}, '持仓周期提醒'),
+        ('error_summary', 'error_summary',
+         'schedulers.sync_error_summary', 'generate_error_summary',
+         {'hour': 23, 'minute': 0}, '同步错误汇总'),
+        ('feishu_backup', 'feishu_backup',
+         'schedulers.feishu_backup', 'sync_feishu_backup',
+         {'hour': 2, 'minute': 30}, '飞书备份'),
+        ('feishu_change_review', 'feishu_change_review',
+         'schedulers.feishu_change_review', 'sync_feishu_change_review',
+         {'hour': 3, 'minute': 0}, '飞书手动修改审计同步'),
+        ('weight_reminder', 'weight_reminder',
+         'schedulers.weight_reminder', 'check_weight_reminder',
+         {'hour': 7, 'minute': 30}, '体重记录提醒'),
+    ]
+
     def __init__(self, config_path: str = 'config.json'):
         """
         初始化服务
@@ -51,8 +133,11 @@ class AssetSyncService:
         :param config_path: 配置文件路径
         """
         self.config_path = config_path
-        self.config = Config(config_path)
-        self.scheduler: Optional[BlockingScheduler] = None
+        self.config = Config.load_cached(config_path)
+        self.scheduler = None  # BackgroundScheduler, 由_setup_scheduler创建
+        self._stop_event = threading.Event()
+        self._workday_sets = {}  # 年份 -> 工作日序数frozenset
+        self._failed_jobs = set()  # 上次执行失败的任务id, 用于恢复日志
 
         # 初始化日志
         logging_config = self.config.get_logging_config()
@@ -68,6 +153,8 @@ class AssetSyncService:
         logger.info("=" * 60)
 
         # 初始化告警管理器
+        from utils.alert import AlertManager
+
         alert_config = self.config.get_asset_sync_config().get('alerts', {})
         self.alert_manager = AlertManager(
             webhook_url=alert_config.get('feishu_webhook', ''),
@@ -76,17 +163,40 @@ class AssetSyncService:
 
     def _setup_scheduler(self):
         """配置调度器"""
-        self.scheduler = BlockingScheduler(timezone='Asia/Shanghai')
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.executors.pool import ThreadPoolExecutor
+        from apscheduler.events import (
+            EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+        )
+
+        # 任务全部是HTTP/DB I/O密集型, 放到线程池执行器里让
+        # 同一时间点触发的任务并行推进, 而不是在单线程上排队
+        # coalesce+max_instances: 休眠/暂停后积压的触发合并成一次补跑,
+        # 不会在恢复时连发N次全量同步
+        self.scheduler = BackgroundScheduler(
+            timezone=TIMEZONE,
+            executors={'default': ThreadPoolExecutor(8)},
+            job_defaults={
+                'coalesce': True,
+                'max_instances': 1,
+                'misfire_grace_time': 300
+            }
+        )
 
         # 添加事件监听
         self.scheduler.add_listener(self._on_job_executed, EVENT_JOB_EXECUTED)
         self.scheduler.add_listener(self._on_job_error, EVENT_JOB_ERROR)
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
 
         # 获取调度器配置
         asset_sync = self.config.get_asset_sync_config()
         scheduler_config = asset_sync.get('scheduler', {})
 
-        # 1. 加密货币同步任务
+        # 注册信息先攒起来, 最后合并成一条日志
+        # (逐条logger.info每次都要过一遍sink的rotate检查)
+        registered = []
+
+        # 加密货币同步任务 (特殊: 仅支持interval=hour, 配置错误时告警)
         crypto_sync_config = scheduler_config.get('crypto_sync', {})
         if crypto_sync_config.get('enabled', False):
             interval = crypto_sync_config.get('interval', 'hour')
@@ -95,321 +205,91 @@ class AssetSyncService:
 
             if interval == 'hour':
                 # 每小时执行
+                sync_crypto = _resolve('schedulers.crypto_sync', 'sync_crypto')
+                # jitter把整点触发抖开, 多实例部署时不会同秒齐射交易所API
                 self.scheduler.add_job(
-                    func=lambda: sync_crypto(self.config_path),
-                    trigger='cron',
-                    hour=hour,
-                    minute=minute,
+                    func=partial(sync_crypto, self.config_path),
+                    trigger=_cron_trigger('加密货币同步', jitter=30,
+                                          hour=hour, minute=minute),
                     id='crypto_sync',
                     name='加密货币同步',
                     replace_existing=True
                 )
-                logger.info(f"已注册任务: 加密货币同步 (每小时 {minute}分)")
+                registered.append(('加密货币同步', f"每小时 {minute}分"))
             else:
                 logger.warning(f"加密货币同步任务配置的 interval 不支持: {interval}")
 
-        # 2. 基金同步任务
-        fund_sync_config = scheduler_config.get('fund_sync', {})
-        if fund_sync_config.get('enabled', False):
-            hour = fund_sync_config.get('hour', 9)
-            minute = fund_sync_config.get('minute', 0)
-
-            self.scheduler.add_job(
-                func=lambda: sync_fund(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='fund_sync',
-                name='基金同步',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 基金同步 (每天 {hour:02d}:{minute:02d})")
-
-        # 3. 每日快照任务
-        snapshot_config = scheduler_config.get('snapshot', {})
-        if snapshot_config.get('enabled', False):
-            hour = snapshot_config.get('hour', 0)
-            minute = snapshot_config.get('minute', 0)
-
-            self.scheduler.add_job(
-                func=lambda: create_daily_snapshot(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='daily_snapshot',
-                name='每日快照',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 每日快照 (每天 {hour:02d}:{minute:02d})")
-
-        # 4. 资产分布同步任务 (快照后5分钟)
-        distribution_config = scheduler_config.get('distribution_sync', {})
-        if distribution_config.get('enabled', False):
-            hour = distribution_config.get('hour', 0)
-            minute = distribution_config.get('minute', 5)
-
-            self.scheduler.add_job(
-                func=lambda: sync_asset_distribution(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='distribution_sync',
-                name='资产分布同步',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 资产分布同步 (每天 {hour:02d}:{minute:02d})")
-
-        # 5. 每日报告任务 (每天早上 9:30)
-        report_config = scheduler_config.get('daily_report', {})
-        if report_config.get('enabled', False):
-            hour = report_config.get('hour', 9)
-            minute = report_config.get('minute', 30)
-
-            self.scheduler.add_job(
-                func=lambda: send_daily_report(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='daily_report',
-                name='每日报告',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 每日报告 (每天 {hour:02d}:{minute:02d})")
-
-        # 6. 价格波动告警任务
-        alert_config = scheduler_config.get('price_alert', {})
-        if alert_config.get('enabled', False):
-            hour = alert_config.get('hour', '*')
-            minute = alert_config.get('minute', 5)
+        # 常规cron任务统一注册
+        for config_key, job_id, module_name, func_name, default_cron, name in self.JOBS:
+            job_config = scheduler_config.get(config_key, {})
+            if not job_config.get('enabled', False):
+                continue
 
+            cron = {k: job_config.get(k, v) for k, v in default_cron.items()}
             self.scheduler.add_job(
-                func=lambda: check_price_alerts(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='price_alert',
-                name='价格波动告警',
+                func=partial(_resolve(module_name, func_name), self.config_path),
+                trigger=_cron_trigger(name, **cron),
+                id=job_id,
+                name=name,
                 replace_existing=True
             )
-            if hour == '*':
-                logger.info(f"已注册任务: 价格波动告警 (每小时 {minute}分)")
-            else:
-                logger.info(f"已注册任务: 价格波动告警 (每天 {hour:02d}:{minute:02d})")
-
-        # 7. 周报任务 (每周一早上 9:00)
-        weekly_report_config = scheduler_config.get('weekly_report', {})
-        if weekly_report_config.get('enabled', False):
-            day_of_week = weekly_report_config.get('day_of_week', 'mon')
-            hour = weekly_report_config.get('hour', 9)
-            minute = weekly_report_config.get('minute', 0)
+            registered.append((name, self._cron_desc(cron)))
 
-            self.scheduler.add_job(
-                func=lambda: generate_weekly_report(self.config_path),
-                trigger='cron',
-                day_of_week=day_of_week,
-                hour=hour,
-                minute=minute,
-                id='weekly_report',
-                name='周报',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 周报 (每周{day_of_week} {hour:02d}:{minute:02d})")
-
-        # 8. 资产月报任务 (每月1号早上 9:00)
+        # 财务收支月报 (特殊: 复用资产月报的开关和日期, 时间推迟到10:00)
         monthly_report_config = scheduler_config.get('monthly_report', {})
         if monthly_report_config.get('enabled', False):
             day = monthly_report_config.get('day', 1)
-            hour = monthly_report_config.get('hour', 9)
-            minute = monthly_report_config.get('minute', 0)
-
+            send_financial_monthly_report = _resolve(
+                'schedulers.monthly_report', 'send_monthly_report')
             self.scheduler.add_job(
-                func=lambda: generate_monthly_report(self.config_path),
-                trigger='cron',
-                day=day,
-                hour=hour,
-                minute=minute,
-                id='monthly_report',
-                name='资产月报',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 资产月报 (每月{day}号 {hour:02d}:{minute:02d})")
-
-            # 8.1 财务收支月报任务 (每月1号早上 10:00)
-            # 复用 asset_sync.scheduler.monthly_report.enabled 开关，或者默认为开启
-            # 为了简单，我们假设只要启用了月报，就同时发财务月报，时间推迟一小时
-            self.scheduler.add_job(
-                func=lambda: send_financial_monthly_report(self.config_path),
-                trigger='cron',
-                day=day,
-                hour=10, # 默认10点发送财务月报
-                minute=0,
+                func=partial(send_financial_monthly_report, self.config_path),
+                # 默认10点发送财务月报
+                trigger=_cron_trigger('财务收支月报', day=day, hour=10, minute=0),
                 id='financial_monthly_report',
                 name='财务收支月报',
                 replace_existing=True
             )
-            logger.info(f"已注册任务: 财务收支月报 (每月{day}号 10:00)")
-
-        # 9. 净值里程碑检查任务 (每天快照后10分钟检查)
-        milestone_config = scheduler_config.get('milestone_alert', {})
-        if milestone_config.get('enabled', False):
-            hour = milestone_config.get('hour', 0)
-            minute = milestone_config.get('minute', 10)
-
-            self.scheduler.add_job(
-                func=lambda: check_milestones(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='milestone_alert',
-                name='净值里程碑检查',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 净值里程碑检查 (每天 {hour:02d}:{minute:02d})")
+            registered.append(('财务收支月报', f"每月{day}号 10:00"))
 
-        # 10. 持仓周期提醒任务 (每天早上 10:00)
-        holding_period_config = scheduler_config.get('holding_period_reminder', {})
-        if holding_period_config.get('enabled', False):
-            hour = holding_period_config.get('hour', 10)
-            minute = holding_period_config.get('minute', 0)
-
-            self.scheduler.add_job(
-                func=lambda: check_holding_periods(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='holding_period_reminder',
-                name='持仓周期提醒',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 持仓周期提醒 (每天 {hour:02d}:{minute:02d})")
-
-        # 11. 同步错误汇总任务 (每天晚上 23:00)
-        error_summary_config = scheduler_config.get('error_summary', {})
-        if error_summary_config.get('enabled', False):
-            hour = error_summary_config.get('hour', 23)
-            minute = error_summary_config.get('minute', 0)
-
-            self.scheduler.add_job(
-                func=lambda: generate_error_summary(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='error_summary',
-                name='同步错误汇总',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 同步错误汇总 (每天 {hour:02d}:{minute:02d})")
-
-        # 12. 数据库备份任务 (每天凌晨 1点)
+        # 数据库备份任务 (特殊: 配置在 asset_sync.database.backup 下)
         db_config = asset_sync.get('database', {})
         backup_config = db_config.get('backup', {})
         if backup_config.get('enabled', False):
+            # 备份可能跑很久: 错过的触发在1小时宽限内合并成一次执行,
+            # 不会在备份结束后补跑一串积压任务
             self.scheduler.add_job(
-                func=lambda: self._backup_database(),
-                trigger='cron',
-                hour=1,
-                minute=0,
+                func=self._backup_database,
+                trigger=_cron_trigger('数据库备份', hour=1, minute=0),
                 id='database_backup',
                 name='数据库备份',
-                replace_existing=True
+                replace_existing=True,
+                coalesce=True,
+                misfire_grace_time=3600
             )
-            logger.info(f"已注册任务: 数据库备份 (每天 01:00)")
+            registered.append(('数据库备份', '每天 01:00'))
 
-        # 13. 飞书多维表备份任务
-        feishu_backup_config = scheduler_config.get('feishu_backup', {})
-        if feishu_backup_config.get('enabled', False):
-            hour = feishu_backup_config.get('hour', 2)
-            minute = feishu_backup_config.get('minute', 30)
-
-            self.scheduler.add_job(
-                func=lambda: sync_feishu_backup(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='feishu_backup',
-                name='飞书备份',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 飞书备份 (每天 {hour:02d}:{minute:02d})")
-
-        # 14. 飞书手动修改审计同步任务
-        review_sync_config = scheduler_config.get('feishu_change_review', {})
-        if review_sync_config.get('enabled', False):
-            hour = review_sync_config.get('hour', 3)
-            minute = review_sync_config.get('minute', 0)
-
-            self.scheduler.add_job(
-                func=lambda: sync_feishu_change_review(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='feishu_change_review',
-                name='飞书手动修改审计同步',
-                replace_existing=True
-            )
-            logger.info(f"已注册任务: 飞书手动修改审计同步 (每天 {hour:02d}:{minute:02d})")
-
-        # 15. 健康建议任务 (工作日18:00, 休息日11:30和18:00)
+        # 健康建议任务 (特殊: 工作日18:00, 休息日11:30和18:00)
+        # 节假日调休提前已知, 直接把未来60天的实际触发点排成一次性任务,
+        # 不再用"周几cron触发+运行时判断调休后返回"的空转模式;
+        # 每月1号的维护任务向后补排下一批
         health_advisor_config = scheduler_config.get('health_advisor', {})
         if health_advisor_config.get('enabled', False):
-            from chinese_calendar import is_workday as is_cn_workday
-            from datetime import datetime
-
-            # 工作日18:00
-            self.scheduler.add_job(
-                func=lambda: self._conditional_health_advice(True),
-                trigger='cron',
-                day_of_week='mon-fri',
-                hour=18,
-                minute=0,
-                id='health_advisor_workday_evening',
-                name='健康建议(工作日晚)',
-                replace_existing=True
-            )
-            logger.info("已注册任务: 健康建议(工作日晚) (周一至周五 18:00)")
-
-            # 休息日11:30
+            count = self._schedule_health_advice()
             self.scheduler.add_job(
-                func=lambda: self._conditional_health_advice(False),
-                trigger='cron',
-                day_of_week='sat-sun',
-                hour=11,
-                minute=30,
-                id='health_advisor_weekend_noon',
-                name='健康建议(休息日午)',
+                func=self._schedule_health_advice,
+                trigger=_cron_trigger('健康建议排期刷新', day=1, hour=0, minute=30),
+                id='health_advisor_refresh',
+                name='健康建议排期刷新',
                 replace_existing=True
             )
-            logger.info("已注册任务: 健康建议(休息日午) (周六周日 11:30)")
+            registered.append(
+                ('健康建议', f"工作日18:00, 休息日11:30/18:00 (未来60天已排{count}次)"))
 
-            # 休息日18:00
-            self.scheduler.add_job(
-                func=lambda: self._conditional_health_advice(False),
-                trigger='cron',
-                day_of_week='sat-sun',
-                hour=18,
-                minute=0,
-                id='health_advisor_weekend_evening',
-                name='健康建议(休息日晚)',
-                replace_existing=True
-            )
-            logger.info("已注册任务: 健康建议(休息日晚) (周六周日 18:00)")
-
-        # 16. 体重记录提醒任务 (每天早上7:30)
-        weight_reminder_config = scheduler_config.get('weight_reminder', {})
-        if weight_reminder_config.get('enabled', False):
-            hour = weight_reminder_config.get('hour', 7)
-            minute = weight_reminder_config.get('minute', 30)
-
-            self.scheduler.add_job(
-                func=lambda: check_weight_reminder(self.config_path),
-                trigger='cron',
-                hour=hour,
-                minute=minute,
-                id='weight_reminder',
-                name='体重记录提醒',
-                replace_existing=True
+        if registered:
+            logger.info(
+                "已注册任务:\n"
+                + "\n".join(f"  - {name}: {desc}" for name, desc in registered)
             )
-            logger.info(f"已注册任务: 体重记录提醒 (每天 {hour:02d}:{minute:02d})")
 
         # 检查是否有任务被注册
         jobs = self.scheduler.get_jobs()
@@ -418,36 +298,132 @@ class AssetSyncService:
             logger.warning("请检查 config.json 中的 asset_sync.scheduler 配置")
             logger.warning("enabled 字段需要设置为 true")
 
-    def _conditional_health_advice(self, is_workday: bool):
+    @staticmethod
+    def _cron_desc(cron):
+        """把cron参数转成日志里的调度描述"""
+        hour = cron.get('hour')
+        minute = cron.get('minute', 0)
+        if 'day_of_week' in cron:
+            return f"每周{cron['day_of_week']} {hour:02d}:{minute:02d}"
+        if 'day' in cron:
+            return f"每月{cron['day']}号 {hour:02d}:{minute:02d}"
+        if hour == '*':
+            return f"每小时 {minute}分"
+        return f"每天 {hour:02d}:{minute:02d}"
+
+    def _workday_set_for(self, year):
         """
-        根据实际情况决定是否发送健康建议
+        某年的工作日序数集合 (按年惰性预计算)
+        chinese_calendar每次查询都要扫节假日表, 全年状态提前已知,
+        预计算成frozenset后每次触发只剩O(1)成员判断; 跨年自动重建
 
-        :param is_workday: 预期是否工作日
+        节假日表只随版本发布到已公布的年份, 越界日期chinese_calendar
+        会抛NotImplementedError, 计算在最后覆盖日截断而不是让启动崩掉
+        :return: (工作日序数frozenset, 数据覆盖到的最后一天的序数)
         """
-        try:
+        cached = self._workday_sets.get(year)
+        if cached is None:
+            # chinese_calendar自带全量节假日表, 保持惰性导入:
+            # 未启用健康建议任务时不加载
             from chinese_calendar import is_workday as is_cn_workday
-            from datetime import datetime
 
-            # 检查今天是否真的是工作日/休息日(考虑节假日调休)
-            today = datetime.now().date()
-            actual_is_workday = is_cn_workday(today)
+            day = date(year, 1, 1)
+            ordinals = []
+            while day.year == year:
+                try:
+                    workday = is_cn_workday(day)
+                except NotImplementedError:
+                    # 这一天还没发布节假日数据, 覆盖范围到前一天为止
+                    break
+                if workday:
+                    ordinals.append(day.toordinal())
+                day += timedelta(days=1)
+
+            cached = (frozenset(ordinals), day.toordinal() - 1)
+            self._workday_sets[year] = cached
+        return cached
+
+    def _schedule_health_advice(self, horizon_days: int = 60) -> int:
+        """
+        把未来horizon_days天内健康建议的实际触发点排成一次性任务
+        工作日只在18:00, 休息日在11:30和18:00 (按节假日调休判断);
+        一次性任务触发后自动移除, replace_existing保证重复排期幂等
 
-            # 如果实际情况与预期不符,跳过执行
-            # 例如: 周一是中秋节(休息日), 但cron按周一触发了工作日任务
-            if actual_is_workday != is_workday:
-                logger.info(f"今天实际是{'工作日' if actual_is_workday else '休息日'},跳过任务")
-                return
+        :param horizon_days: 向后排期的天数
+        :return: 本次排入的触发点数量
+        """
+        from apscheduler.triggers.date import DateTrigger
+
+        generate = partial(
+            _resolve('schedulers.health_advisor', 'generate_health_advice'),
+            self.config_path)
+
+        now = datetime.now()
+        count = 0
+        for offset in range(horizon_days):
+            day = now.date() + timedelta(days=offset)
+            workdays, covered_until = self._workday_set_for(day.year)
+            if day.toordinal() > covered_until:
+                # 年末窗口: 下一年的节假日数据尚未发布, 排期到此为止,
+                # 每月1日的刷新任务会在数据跟上后补齐后续触发点
+                logger.warning(
+                    f"节假日数据只覆盖到 {date.fromordinal(covered_until)}, "
+                    f"健康建议排期截断于该日 (已排 {count} 个触发点)")
+                break
+            if day.toordinal() in workdays:
+                slots = [time(18, 0)]
+            else:
+                slots = [time(11, 30), time(18, 0)]
 
-            # 执行健康建议生成
-            generate_health_advice(self.config_path)
+            for slot in slots:
+                run_date = datetime.combine(day, slot)
+                if run_date <= now:
+                    continue
+                self.scheduler.add_job(
+                    func=generate,
+                    trigger=DateTrigger(run_date=run_date, timezone=TIMEZONE),
+                    id=f"health_{day:%Y%m%d}_{slot:%H%M}",
+                    name='健康建议',
+                    replace_existing=True
+                )
+                count += 1
+        return count
 
-        except Exception as e:
-            logger.error(f"健康建议任务异常: {e}")
+    def _run_backup_subprocess(self):
+        """
+        在子进程里运行备份并解析结果
+        多GB的SQLite拷贝+压缩放到独立进程, 服务进程不背这份I/O和
+        GIL占用; 直接os.fork对多线程进程不安全(子进程可能继承
+        处于持有状态的锁), 所以走干净的子进程
+        :return: 备份结果字典
+        """
+        script = project_root / 'src' / 'utils' / 'backup.py'
+        proc = subprocess.run(
+            [sys.executable, str(script), self.config_path],
+            capture_output=True,
+            text=True,
+            timeout=3600
+        )
+
+        # 子进程最后一行输出结果JSON
+        for line in reversed(proc.stdout.splitlines()):
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    break
+
+        stderr_tail = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''
+        return {
+            'success': proc.returncode == 0,
+            'error': f"备份子进程退出码{proc.returncode}: {stderr_tail}"
+        }
 
     def _backup_database(self):
         """执行数据库备份"""
         try:
-            result = create_backup(self.config_path)
+            result = self._run_backup_subprocess()
 
             if result.get('success'):
                 logger.info(f"数据库备份成功: {result.get('path')}")
@@ -474,21 +450,48 @@ class AssetSyncService:
             )
 
     def _on_job_executed(self, event):
-        """任务执行成功的回调"""
-        logger.info(f"任务执行完成: {event.job_id}")
+        """
+        任务执行成功的回调
+        每小时任务一天要成功几十次, 逐条info只是噪音;
+        常规成功降为debug, 只在失败->成功的恢复时刻升回info
+        """
+        if event.job_id in self._failed_jobs:
+            self._failed_jobs.discard(event.job_id)
+            logger.info(f"任务恢复正常: {event.job_id}")
+        else:
+            logger.debug(f"任务执行完成: {event.job_id}")
 
     def _on_job_error(self, event):
         """任务执行失败的回调"""
+        self._failed_jobs.add(event.job_id)
         logger.error(f"任务执行失败: {event.job_id}, 异常: {event.exception}")
 
+    def _on_job_missed(self, event):
+        """
+        任务错过触发的回调
+        超出misfire_grace_time的触发会被调度器静默丢弃,
+        这里记下来方便排查"日报没发"这类问题, 必要时可手动--task补跑
+        """
+        logger.warning(
+            f"任务错过触发已跳过: {event.job_id}, "
+            f"原定时间: {event.scheduled_run_time}"
+        )
+
     def _setup_signal_handlers(self):
         """设置信号处理器 (优雅关闭)"""
         def signal_handler(signum, frame):
             logger.info(f"\n收到信号 {signum}, 准备关闭服务...")
 
-            # 发送停止通知
+            # 发送停止通知 (放到daemon线程里最多等2秒:
+            # 飞书/SMTP不可达时不能拖住关闭流程, 否则systemd等不到
+            # 优雅退出就会SIGKILL, 连带丢掉scheduler.shutdown的收尾)
             try:
-                self.alert_manager.send_system_stop()
+                notify = threading.Thread(
+                    target=self.alert_manager.send_system_stop, daemon=True)
+                notify.start()
+                notify.join(timeout=2)
+                if notify.is_alive():
+                    logger.warning("停止通知未在2秒内完成, 不再等待")
             except Exception as e:
                 logger.error(f"发送停止通知失败: {e}")
 
@@ -496,6 +499,7 @@ class AssetSyncService:
                 self.scheduler.shutdown(wait=True)
 
             logger.info("服务已关闭")
+            self._stop_event.set()
             sys.exit(0)
 
         signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
@@ -529,8 +533,9 @@ class AssetSyncService:
             except Exception as e:
                 logger.error(f"发送启动通知失败: {e}")
 
-            # 启动调度器 (阻塞运行)
+            # 启动调度器 (后台线程调度, 主线程等待退出信号)
             self.scheduler.start()
+            self._stop_event.wait()
 
         except KeyboardInterrupt:
             logger.info("\n用户中断,正在关闭服务...")
@@ -562,8 +567,7 @@ def main():
     )
     parser.add_argument(
         '--task',
-        choices=['crypto', 'fund', 'snapshot', 'distribution', 'report', 'alert',
-                 'weekly', 'monthly', 'financial_report', 'milestone', 'holding', 'summary', 'health', 'weight_reminder'],
+        choices=list(TASKS),
         help='只运行指定任务一次'
     )
 
@@ -574,50 +578,34 @@ def main():
         setup_logger(level='INFO')
 
         if args.task:
+            # 查表派发 + 按需只导入选中任务的模块
             logger.info(f"执行单个任务: {args.task}")
-            if args.task == 'crypto':
-                result = sync_crypto(args.config)
-            elif args.task == 'fund':
-                result = sync_fund(args.config)
-            elif args.task == 'snapshot':
-                result = create_daily_snapshot(args.config)
-            elif args.task == 'distribution':
-                result = sync_asset_distribution(args.config)
-            elif args.task == 'report':
-                result = send_daily_report(args.config)
-            elif args.task == 'alert':
-                result = check_price_alerts(args.config)
-            elif args.task == 'weekly':
-                result = generate_weekly_report(args.config)
-            elif args.task == 'monthly':
-                result = generate_monthly_report(args.config)
-            elif args.task == 'financial_report':
+            module_name, func_name = TASKS[args.task]
+            result = _resolve(module_name, func_name)(args.config)
+            if args.task == 'financial_report':
                 # 财务月报不返回 result (或者返回 None)，为了兼容性
-                send_financial_monthly_report(args.config)
                 result = "Finished"
-            elif args.task == 'milestone':
-                result = check_milestones(args.config)
-            elif args.task == 'holding':
-                result = check_holding_periods(args.config)
-            elif args.task == 'summary':
-                result = generate_error_summary(args.config)
-            elif args.task == 'health':
-                result = generate_health_advice(args.config)
-            elif args.task == 'weight_reminder':
-                result = check_weight_reminder(args.config)
             logger.info(f"任务结果: {result}")
         else:
             logger.info("执行所有任务一次...")
-            logger.info("\n1. 加密货币同步:")
-            crypto_result = sync_crypto(args.config)
-            logger.info(f"   结果: {crypto_result}")
-
-            logger.info("\n2. 基金同步:")
-            fund_result = sync_fund(args.config)
-            logger.info(f"   结果: {fund_result}")
 
+            # 加密货币和基金走不同的外部API, 互不依赖, 并行拉取;
+            # 总耗时从两者之和降到较慢的那个
+            from concurrent.futures import ThreadPoolExecutor as PoolExecutor
+            with PoolExecutor(max_workers=2) as executor:
+                crypto_future = executor.submit(
+                    _resolve('schedulers.crypto_sync', 'sync_crypto'), args.config)
+                fund_future = executor.submit(
+                    _resolve('schedulers.fund_sync', 'sync_fund'), args.config)
+                crypto_result = crypto_future.result()
+                fund_result = fund_future.result()
+
+            logger.info(f"\n1. 加密货币同步:\n   结果: {crypto_result}")
+            logger.info(f"\n2. 基金同步:\n   结果: {fund_result}")
+
+            # 快照汇总前两步写入的持仓数据, 必须在同步完成后执行
             logger.info("\n3. 每日快照:")
-            snapshot_result = create_daily_snapshot(args.config)
+            snapshot_result = _resolve('schedulers.snapshot', 'create_daily_snapshot')(args.config)
             logger.info(f"   结果: {snapshot_result}")
 
             logger.info("\n所有任务执行完成")
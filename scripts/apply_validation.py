@@ -5,7 +5,8 @@
 """
 import sys
 from pathlib import Path
-import csv
+
+import pandas as pd
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -13,7 +14,7 @@ sys.path.insert(0, str(project_root))
 
 from loguru import logger
 from core.config import Config
-from lib.feishu_client import FeishuClient
+from lib.feishu_client import FeishuClient, get_client
 
 
 def apply_validation(
@@ -46,46 +47,47 @@ def apply_validation(
 
     # 初始化飞书客户端
     mcp_config = config.data.get('mcp_server', {})
-    feishu = FeishuClient(
-        app_id=mcp_config['app_id'],
-        app_secret=mcp_config['app_secret']
-    )
-
-    # 读取校验结果
-    updates = []
-    skipped = 0
-
-    with open(validation_file, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            record_id = row['record_id']
-            action = row.get('action', '').strip().upper()
-
-            # 只处理action为UPDATE的记录
-            if action != 'UPDATE':
-                skipped += 1
-                continue
+    feishu = get_client(mcp_config['app_id'], mcp_config['app_secret'])
 
-            predicted_purpose = row['predicted_purpose'].strip()
-            predicted_subcat = row['predicted_subcat'].strip()
+    # 读取校验结果 (整列在C层解析/过滤, 不再逐行建dict)
+    df = pd.read_csv(validation_file, encoding='utf-8-sig',
+                     dtype=str, keep_default_na=False)
+    total_rows = len(df)
 
-            fields = {}
-
-            if predicted_purpose:
-                fields['支出目的'] = predicted_purpose
+    # 只处理action为UPDATE的记录
+    if 'action' in df.columns:
+        df = df[df['action'].str.strip().str.upper() == 'UPDATE']
+    else:
+        df = df.iloc[0:0]
+    skipped = total_rows - len(df)
 
-            if predicted_subcat:
-                fields['细类'] = predicted_subcat
+    # 可选列缺失时补空串, 与旧的row.get(..., '')行为一致
+    for col in ('note', 'current_purpose', 'current_subcat'):
+        if col not in df.columns:
+            df[col] = ''
 
-            if fields:
-                updates.append({
-                    'record_id': record_id,
-                    'fields': fields,
-                    'note': row.get('note', ''),
-                    'current_purpose': row.get('current_purpose', ''),
-                    'current_subcat': row.get('current_subcat', '')
-                })
+    updates = []
+    for record_id, purpose, subcat, note, cur_purpose, cur_subcat in zip(
+            df['record_id'],
+            df['predicted_purpose'].str.strip(),
+            df['predicted_subcat'].str.strip(),
+            df['note'], df['current_purpose'], df['current_subcat']):
+        fields = {}
+
+        if purpose:
+            fields['支出目的'] = purpose
+
+        if subcat:
+            fields['细类'] = subcat
+
+        if fields:
+            updates.append({
+                'record_id': record_id,
+                'fields': fields,
+                'note': note,
+                'current_purpose': cur_purpose,
+                'current_subcat': cur_subcat
+            })
 
     logger.info(f"读取到 {len(updates)} 条需要更新的记录，跳过 {skipped} 条")
 
@@ -121,32 +123,28 @@ def apply_validation(
 
         logger.info("开始批量更新...")
 
-        # 批量更新（每次100条）
-        batch_size = 100
+        # 批量更新（按API上限500条/批, 各批次并发在途）
+        batch_size = FeishuClient.MAX_BATCH
         success_count = 0
         failed_count = 0
 
         # 只提取record_id和fields
         update_records = [{'record_id': u['record_id'], 'fields': u['fields']} for u in updates]
 
-        for i in range(0, len(update_records), batch_size):
-            batch = update_records[i:i + batch_size]
-
-            try:
-                result = feishu.batch_update_records(
-                    app_token=app_token,
-                    table_id=table_id,
-                    records=batch
-                )
-
-                success_count += result.get('success', 0)
-                failed_count += result.get('failed', 0)
-
-                logger.info(f"批次 {i//batch_size + 1}: 成功 {result.get('success', 0)}, 失败 {result.get('failed', 0)}")
-
-            except Exception as e:
-                logger.error(f"批次 {i//batch_size + 1} 更新失败: {e}")
-                failed_count += len(batch)
+        chunks = [
+            update_records[i:i + batch_size]
+            for i in range(0, len(update_records), batch_size)
+        ]
+        results = feishu.batch_update_records_many(
+            app_token=app_token,
+            table_id=table_id,
+            chunks=chunks
+        )
+
+        for batch_no, result in enumerate(results, 1):
+            success_count += result.get('success', 0)
+            failed_count += result.get('failed', 0)
+            logger.info(f"批次 {batch_no}: 成功 {result.get('success', 0)}, 失败 {result.get('failed', 0)}")
 
         logger.info(f"更新完成: 成功 {success_count}, 失败 {failed_count}")
 
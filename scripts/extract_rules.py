@@ -5,8 +5,10 @@
 """
 import sys
 from pathlib import Path
-import csv
-from collections import defaultdict
+from collections import Counter
+from functools import lru_cache
+
+import pandas as pd
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -14,7 +16,7 @@ sys.path.insert(0, str(project_root))
 
 from loguru import logger
 from core.config import Config
-from lib.feishu_client import FeishuClient
+from lib.feishu_client import get_client
 
 
 def extract_rules(
@@ -49,135 +51,72 @@ def extract_rules(
 
     # 初始化飞书客户端
     mcp_config = config.data.get('mcp_server', {})
-    feishu = FeishuClient(
-        app_id=mcp_config['app_id'],
-        app_secret=mcp_config['app_secret']
-    )
+    feishu = get_client(mcp_config['app_id'], mcp_config['app_secret'])
 
-    # 拉取所有记录
+    # 边拉取边统计: 每页到手立即计数后丢弃, 不再整表攒进all_records
+    # 再跑第二遍; 内存峰值只有一页, 且与iter_records的预取天然重叠
+    # 计数用扁平的 (关键词, 分类, 支出目的, 细类) 四元组:
+    # 单层Counter每次累加只做一次哈希, 也不用为每个规则键养一个内层dict
     logger.info("拉取数据...")
-    all_records = []
-    page_token = None
-
-    while True:
-        items, page_token, has_more = feishu.list_records(
-            app_token=app_token,
-            table_id=table_id,
-            page_token=page_token,
-            page_size=500
+    rule_counts = Counter()
+    total_records = 0
+
+    for page in feishu.iter_records(
+        app_token=app_token,
+        table_id=table_id,
+        page_size=500,
+        field_names=['收支', '分类', '支出目的', '备注', '细类']
+    ):
+        total_records += len(page)
+        for record in page:
+            _count_record(record, rule_counts)
+
+    logger.info(f"拉取到 {total_records} 条记录")
+
+    # 提取规则: 列运算一次性算出每个 (keyword, category) 的最优输出、
+    # 支持度和置信度, 代替逐键的Python循环
+    if rule_counts:
+        df = pd.DataFrame(
+            [(k, c, p, s, n) for (k, c, p, s), n in rule_counts.items()],
+            columns=['keyword', 'category', 'purpose', 'subcat', 'count']
         )
 
-        all_records.extend(items)
-
-        if not has_more:
-            break
-
-    logger.info(f"拉取到 {len(all_records)} 条记录")
-
-    # 统计规则
-    # 使用 (备注关键词, 分类) 作为key，统计对应的 (支出目的, 细类) 的出现次数
-    rule_stats = defaultdict(lambda: defaultdict(int))
-
-    for record in all_records:
-        fields = record.get('fields', {})
-
-        # 只处理支出记录
-        if fields.get('收支') != '支出':
-            continue
-
-        # 提取字段
-        def parse_text(v):
-            if isinstance(v, str):
-                return v
-            if isinstance(v, list) and v:
-                return parse_text(v[0])
-            if isinstance(v, dict):
-                return str(v.get('text', ''))
-            return str(v) if v else ''
-
-        note_field = fields.get('备注', '')
-        note = parse_text(note_field).strip()
-
-        category = str(fields.get('分类', '')).strip()
-        purpose = str(fields.get('支出目的', '')).strip()
-
-        subcat_field = fields.get('细类')
-        subcat = parse_text(subcat_field).strip()
-
-        # 跳过不完整的记录
-        if not note or not category or not purpose or not subcat:
-            continue
-
-        # 提取备注中的关键词（简化版：使用完整备注或前几个字）
-        # 这里可以用更复杂的分词逻辑
-        note_keywords = extract_keywords(note)
-
-        for keyword in note_keywords:
-            # 规则: (keyword, category) -> (purpose, subcat)
-            rule_key = (keyword, category)
-            output = (purpose, subcat)
-            rule_stats[rule_key][output] += 1
-
-    # 提取规则
-    rules = []
-
-    for (keyword, category), outputs in rule_stats.items():
-        # 找出最常见的输出
-        most_common = max(outputs.items(), key=lambda x: x[1])
-        (purpose, subcat), count = most_common
-
-        if count < min_count:
-            continue
-
-        # 计算置信度（该输出占所有输出的比例）
-        total = sum(outputs.values())
-        confidence = count / total
-
-        rules.append({
-            'keyword': keyword,
-            'category': category,
-            'purpose': purpose,
-            'subcat': subcat,
-            'confidence': confidence,
-            'count': count,
-            'total': total
-        })
-
-    # 按置信度和出现次数排序
-    rules.sort(key=lambda x: (x['confidence'], x['count']), reverse=True)
+        grouped = df.groupby(['keyword', 'category'])['count']
+        totals = grouped.transform('sum')
+        best_idx = grouped.idxmax()
+
+        best = df.loc[best_idx].copy()
+        best['total'] = totals.loc[best_idx].values
+        # 置信度: 该输出占所有输出的比例
+        best['confidence'] = best['count'] / best['total']
+
+        # 过滤低支持度规则, 按置信度和出现次数排序并截断
+        best = best[best['count'] >= min_count]
+        best = best.sort_values(
+            ['confidence', 'count'], ascending=False).head(max_rules)
+    else:
+        best = pd.DataFrame(columns=[
+            'keyword', 'category', 'purpose', 'subcat',
+            'count', 'total', 'confidence'
+        ])
 
-    # 限制数量
-    if len(rules) > max_rules:
-        rules = rules[:max_rules]
+    logger.info(f"提取到 {len(best)} 条规则")
 
-    logger.info(f"提取到 {len(rules)} 条规则")
+    # 导出到CSV (DataFrame整体落盘, 保留utf-8-sig的BOM方便Excel打开)
+    fieldnames = [
+        'keyword', 'category', 'purpose', 'subcat',
+        'confidence', 'count', 'total', 'enabled', 'notes'
+    ]
 
-    # 导出到CSV
-    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-        fieldnames = [
-            'keyword', 'category', 'purpose', 'subcat',
-            'confidence', 'count', 'total', 'enabled', 'notes'
-        ]
-
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for rule in rules:
-            writer.writerow({
-                'keyword': rule['keyword'],
-                'category': rule['category'],
-                'purpose': rule['purpose'],
-                'subcat': rule['subcat'],
-                'confidence': f"{rule['confidence']:.2%}",
-                'count': rule['count'],
-                'total': rule['total'],
-                'enabled': 'TRUE',  # 默认启用
-                'notes': ''  # 供用户添加备注
-            })
+    out = best.copy()
+    out['confidence'] = (out['confidence'] * 100).round(2).map('{:.2f}%'.format)
+    out['enabled'] = 'TRUE'  # 默认启用
+    out['notes'] = ''  # 供用户添加备注
+    out[fieldnames].to_csv(output_file, index=False, encoding='utf-8-sig')
 
     logger.info(f"规则已导出到: {output_file}")
 
-    print(f"\n✅ 已提取 {len(rules)} 条规则到: {output_file}")
+    print(f"\n✅ 已提取 {len(best)} 条规则到: {output_file}")
     print("\n使用说明:")
     print("1. 在Excel/飞书表格中打开CSV文件")
     print("2. 检查规则的准确性:")
@@ -193,9 +132,70 @@ def extract_rules(
     print(f"5. 使用规则填充: uv run scripts/fill_by_rules.py {account_name} {output_file}")
 
 
-def extract_keywords(note: str) -> list:
+def _parse_text(v) -> str:
+    """
+    提取飞书字段的文本值
+    响应里实际只有str和[{'text': ...}]两种形态, 按出现频率排列分支;
+    json解析出的都是精确类型, type is比isinstance省掉MRO查找,
+    这个函数每条记录要被调两次
+    """
+    if type(v) is str:
+        return v
+    if type(v) is list:
+        if not v:
+            return ''
+        first = v[0]
+        if type(first) is str:
+            return first
+        if type(first) is dict:
+            return str(first.get('text', ''))
+        return _parse_text(first)
+    if type(v) is dict:
+        return str(v.get('text', ''))
+    return str(v) if v else ''
+
+
+def _count_record(record: dict, rule_counts: Counter):
+    """
+    把单条记录计入规则统计
+    :param record: 飞书记录 {"fields": {...}}
+    :param rule_counts: (关键词, 分类, 支出目的, 细类) 四元组计数器
+    """
+    fields = record.get('fields', {})
+
+    # 只处理支出记录
+    if fields.get('收支') != '支出':
+        return
+
+    # 先做便宜的完整性检查: 分类/支出目的缺失的记录直接出局,
+    # 不用为它们跑备注/细类的文本提取和关键词切分
+    category = str(fields.get('分类', '')).strip()
+    if not category:
+        return
+    purpose = str(fields.get('支出目的', '')).strip()
+    if not purpose:
+        return
+
+    note = _parse_text(fields.get('备注', '')).strip()
+    if not note:
+        return
+    subcat = _parse_text(fields.get('细类')).strip()
+    if not subcat:
+        return
+
+    # 提取备注中的关键词（简化版：使用完整备注或前几个字）
+    # 这里可以用更复杂的分词逻辑
+    for keyword in extract_keywords(note):
+        # 规则: (keyword, category) -> (purpose, subcat)
+        rule_counts[(keyword, category, purpose, subcat)] += 1
+
+
+@lru_cache(maxsize=None)
+def extract_keywords(note: str) -> tuple:
     """
     从备注中提取关键词
+    备注在账单里大量重复("美团"/"星巴克"...), 按备注串缓存结果,
+    每个不同的备注只切一次; 返回元组保证可哈希且不会被调用方改动
 
     简化版实现:
     - 如果备注很短(<=4字)，使用完整备注
@@ -205,21 +205,27 @@ def extract_keywords(note: str) -> list:
     note = note.strip()
 
     if not note:
-        return []
+        return ()
 
+    # 有序去重: set()会打乱顺序且顺序随哈希种子变化,
+    # 关键词顺序影响规则统计的平局取舍, 保持确定性输出
+    seen = set()
     keywords = []
 
     # 策略1: 完整备注(如果够短)
     if len(note) <= 6:
+        seen.add(note)
         keywords.append(note)
 
     # 策略2: 前N个字符
-    for n in [3, 4, 5]:
+    for n in (3, 4, 5):
         if len(note) >= n:
-            keywords.append(note[:n])
+            keyword = note[:n]
+            if keyword not in seen:
+                seen.add(keyword)
+                keywords.append(keyword)
 
-    # 去重
-    return list(set(keywords))
+    return tuple(keywords)
 
 
 if __name__ == '__main__':
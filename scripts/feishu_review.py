@@ -8,7 +8,6 @@
 """
 import sys
 from pathlib import Path
-import time
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -16,12 +15,19 @@ sys.path.insert(0, str(project_root))
 
 from loguru import logger
 from core.config import Config
-from lib.feishu_client import FeishuClient
+from lib.feishu_client import FeishuClient, parse_field_text
 
 
 class FeishuReviewWorkflow:
     """飞书审核工作流程"""
 
+    # 审核表行的列顺序 (列式累积和出批时共用)
+    REVIEW_FIELDS = (
+        '记录ID', '日期', '金额', '分类', '备注',
+        '当前支出目的', '当前细类', '建议支出目的', '建议细类',
+        '最终支出目的', '最终细类', '状态'
+    )
+
     def __init__(self, config: Config, account_name: str):
         self.config = config
         self.account_name = account_name
@@ -145,171 +151,84 @@ class FeishuReviewWorkflow:
         # 确保审核表存在
         review_table_id = self.ensure_review_table()
 
-        # 拉取记录
+        # 拉取记录 (iter_records在后台预取下一页, 翻页往返与本页处理重叠)
+        # 每页到手立即校验后丢弃, 不整表攒在内存里
         logger.info("拉取数据...")
-        all_records = []
-        page_token = None
-
-        while len(all_records) < max_records:
-            items, page_token, has_more = self.feishu.list_records(
-                app_token=self.app_token,
-                table_id=self.table_id,
-                page_token=page_token,
-                page_size=500
-            )
-
-            all_records.extend(items)
-
-            if not has_more:
-                break
-
-        logger.info(f"拉取到 {len(all_records)} 条记录")
+        page_size = 500
 
         # 校验并准备推送
-        to_push = []
+        # 列式累积: 每列一个list, 代替成千上万个12键dict,
+        # Python对象开销约减半, 出批时再按行物化
+        to_push = {name: [] for name in self.REVIEW_FIELDS}
+        total_records = 0
         match_count = 0
         mismatch_count = 0
         no_rule_count = 0
 
-        for record in all_records:
-            fields = record.get('fields', {})
-            record_id = record.get('record_id')
-
-            # 只处理支出
-            if fields.get('收支') != '支出':
-                continue
-
-            # 提取字段
-            def parse_text(v):
-                if isinstance(v, str):
-                    return v
-                if isinstance(v, list) and v:
-                    return parse_text(v[0])
-                if isinstance(v, dict):
-                    return str(v.get('text', ''))
-                return str(v) if v else ''
-
-            note_field = fields.get('备注', '')
-            note = parse_text(note_field).strip()
-
-            category = str(fields.get('分类', '')).strip()
-            current_purpose = str(fields.get('支出目的', '')).strip()
-
-            subcat_field = fields.get('细类')
-            current_subcat = parse_text(subcat_field).strip()
-
-            # 处理日期
-            date_field = fields.get('日期')
-            date_ts = date_field if isinstance(date_field, (int, float)) else None
-
-            # 处理金额 - 确保是数字类型
-            amount_field = fields.get('金额', 0)
-            try:
-                amount = float(amount_field) if amount_field else 0.0
-            except (ValueError, TypeError):
-                amount = 0.0
-
-            if not note or not category:
-                continue
-
-            # 匹配规则
-            predicted_purpose, predicted_subcat = matcher.match(note, category)
-
-            # 判断是否一致
-            purpose_match = (current_purpose == predicted_purpose) if predicted_purpose else None
-            subcat_match = (current_subcat == predicted_subcat) if predicted_subcat else None
-
-            # 统计
-            if predicted_purpose is None and predicted_subcat is None:
-                no_rule_count += 1
-                status = '待审核'  # 无规则，需要人工确认
-
-                # 推送到审核表
-                to_push.append({
-                    '记录ID': record_id,
-                    '日期': date_ts,
-                    '金额': amount,
-                    '分类': category,
-                    '备注': note,
-                    '当前支出目的': current_purpose,
-                    '当前细类': current_subcat,
-                    '建议支出目的': '',
-                    '建议细类': '',
-                    '最终支出目的': current_purpose,
-                    '最终细类': current_subcat,
-                    '状态': status
-                })
-
-            elif purpose_match and subcat_match:
-                match_count += 1
-                # 匹配，不推送
-
-            else:
-                mismatch_count += 1
-                status = '待审核'
-
-                # 不一致，推送到审核表
-                to_push.append({
-                    '记录ID': record_id,
-                    '日期': date_ts,
-                    '金额': amount,
-                    '分类': category,
-                    '备注': note,
-                    '当前支出目的': current_purpose,
-                    '当前细类': current_subcat,
-                    '建议支出目的': predicted_purpose or '',
-                    '建议细类': predicted_subcat or '',
-                    '最终支出目的': predicted_purpose or current_purpose,
-                    '最终细类': predicted_subcat or current_subcat,
-                    '状态': status
-                })
-
+        for items in self.feishu.iter_records(
+            app_token=self.app_token,
+            table_id=self.table_id,
+            page_size=page_size,
+            max_pages=-(-max_records // page_size),
+            # 只取校验用到的列, 宽表下少拉少解析
+            field_names=['收支', '备注', '分类', '支出目的', '细类', '日期', '金额']
+        ):
+            total_records += len(items)
+            for record in items:
+                outcome = self._classify_record(record, matcher, to_push)
+                if outcome == 'match':
+                    match_count += 1
+                elif outcome == 'mismatch':
+                    mismatch_count += 1
+                elif outcome == 'no_rule':
+                    no_rule_count += 1
+
+        pending = len(to_push['记录ID'])
+
+        logger.info(f"拉取到 {total_records} 条记录")
         logger.info(f"校验完成: 匹配 {match_count}, 不匹配 {mismatch_count}, 无规则 {no_rule_count}")
-        logger.info(f"需要推送到审核表: {len(to_push)} 条记录")
+        logger.info(f"需要推送到审核表: {pending} 条记录")
 
-        if not to_push:
+        if not pending:
             logger.info("所有记录都已匹配，无需审核")
             return
 
-        # 批量推送到审核表
+        # 批量推送到审核表 (各批次并发在途, 单表并发和限流由客户端兜底,
+        # 不再在批次间固定sleep)
         logger.info("推送记录到审核表...")
 
-        batch_size = 100
+        # 按API上限出批; 失败降级(对半拆批/逐条兜底)和限流退避由客户端处理
+        batch_size = FeishuClient.MAX_BATCH
         success_count = 0
         failed_count = 0
 
-        for i in range(0, len(to_push), batch_size):
-            batch = to_push[i:i + batch_size]
-
-            try:
-                # 批量创建记录
-                records = [{'fields': item} for item in batch]
-
-                # 记录第一条数据用于调试
-                if i == 0:
-                    logger.debug(f"第一条记录数据: {records[0]}")
-
-                result = self.feishu.batch_create_records(
-                    app_token=self.app_token,
-                    table_id=review_table_id,
-                    records=records
-                )
-
-                # 检查实际结果
-                if result.get('failed', 0) > 0:
-                    logger.warning(f"批次 {i//batch_size + 1}: 有 {result['failed']} 条失败")
-                    logger.warning(f"错误详情: {result.get('errors', [])}")
-                    failed_count += result['failed']
-                    success_count += result.get('success', 0)
-                else:
-                    success_count += len(batch)
-                    logger.info(f"批次 {i//batch_size + 1}: 成功推送 {len(batch)} 条")
+        # 列式缓冲按行物化成批量创建的payload
+        columns = [to_push[name] for name in self.REVIEW_FIELDS]
+        records = [
+            {'fields': dict(zip(self.REVIEW_FIELDS, row))}
+            for row in zip(*columns)
+        ]
+        logger.debug(f"第一条记录数据: {records[0]}")
 
-                time.sleep(0.2)  # 避免API限流
+        chunks = [
+            records[i:i + batch_size]
+            for i in range(0, len(records), batch_size)
+        ]
+        results = self.feishu.batch_create_records_many(
+            app_token=self.app_token,
+            table_id=review_table_id,
+            chunks=chunks
+        )
 
-            except Exception as e:
-                logger.error(f"批次 {i//batch_size + 1} 推送失败: {e}")
-                failed_count += len(batch)
+        for batch_no, (chunk, result) in enumerate(zip(chunks, results), 1):
+            if result.get('failed', 0) > 0:
+                logger.warning(f"批次 {batch_no}: 有 {result['failed']} 条失败")
+                logger.warning(f"错误详情: {result.get('errors', [])}")
+                failed_count += result['failed']
+                success_count += result.get('success', 0)
+            else:
+                success_count += len(chunk)
+                logger.info(f"批次 {batch_no}: 成功推送 {len(chunk)} 条")
 
         logger.info(f"推送完成: 成功 {success_count}, 失败 {failed_count}")
 
@@ -337,6 +256,72 @@ class FeishuReviewWorkflow:
         print(f"3. 将'状态'改为'已确认'")
         print(f"4. 运行同步命令更新回原表")
 
+    def _classify_record(self, record: dict, matcher, to_push: dict):
+        """
+        校验单条记录, 需要人工审核的追加进to_push
+        :param record: 飞书记录 {"fields": {...}}
+        :param matcher: 规则匹配器
+        :param to_push: 按REVIEW_FIELDS组织的列式缓冲 (原地追加)
+        :return: 'match' / 'mismatch' / 'no_rule', 跳过的记录返回None
+        """
+        fields = record.get('fields', {})
+        record_id = record.get('record_id')
+
+        # 只处理支出
+        if fields.get('收支') != '支出':
+            return None
+
+        # 提取字段
+        note_field = fields.get('备注', '')
+        note = parse_field_text(note_field).strip()
+
+        category = str(fields.get('分类', '')).strip()
+        current_purpose = str(fields.get('支出目的', '')).strip()
+
+        subcat_field = fields.get('细类')
+        current_subcat = parse_field_text(subcat_field).strip()
+
+        # 处理日期
+        date_field = fields.get('日期')
+        date_ts = date_field if isinstance(date_field, (int, float)) else None
+
+        # 处理金额 - 确保是数字类型
+        amount_field = fields.get('金额', 0)
+        try:
+            amount = float(amount_field) if amount_field else 0.0
+        except (ValueError, TypeError):
+            amount = 0.0
+
+        if not note or not category:
+            return None
+
+        # 匹配规则
+        predicted_purpose, predicted_subcat = matcher.match(note, category)
+
+        # 无规则: 最终值只能回填当前值, 推出去也是一行无变化的审核行
+        if predicted_purpose is None and predicted_subcat is None:
+            return 'no_rule'
+
+        # 先合并出最终值再判断: 规则只命中一半且命中值与当前相同的记录
+        # 以前落进不一致分支, 推送的行和当前状态完全一样, 纯浪费写入
+        final_purpose = predicted_purpose or current_purpose
+        final_subcat = predicted_subcat or current_subcat
+        if final_purpose == current_purpose and final_subcat == current_subcat:
+            # 匹配，不推送
+            return 'match'
+
+        row = (
+            record_id, date_ts, amount, category, note,
+            current_purpose, current_subcat,
+            predicted_purpose or '', predicted_subcat or '',
+            final_purpose, final_subcat,
+            '待审核'
+        )
+        for name, value in zip(self.REVIEW_FIELDS, row):
+            to_push[name].append(value)
+
+        return 'mismatch'
+
     def sync_from_review(self, dry_run: bool = True):
         """从审核表同步回原表"""
         if not self.review_table_id:
@@ -345,68 +330,49 @@ class FeishuReviewWorkflow:
 
         logger.info("从审核表读取数据...")
 
-        # 拉取审核表中"已确认"的记录
-        all_records = []
-        page_token = None
-
-        while True:
-            items, page_token, has_more = self.feishu.list_records(
-                app_token=self.app_token,
-                table_id=self.review_table_id,
-                page_token=page_token,
-                page_size=500
-            )
-
-            all_records.extend(items)
-
-            if not has_more:
-                break
-
-        logger.info(f"读取到 {len(all_records)} 条审核记录")
-
-        # 筛选"已确认"状态的记录
+        # 拉取审核表中"已确认"的记录 (预取翻页, 逐页筛选后即丢弃)
         updates = []
+        total_records = 0
 
-        for record in all_records:
-            fields = record.get('fields', {})
-            review_record_id = record.get('record_id')
-
-            # 提取字段
-            def parse_text(v):
-                if isinstance(v, str):
-                    return v
-                if isinstance(v, list) and v:
-                    return parse_text(v[0])
-                if isinstance(v, dict):
-                    return str(v.get('text', ''))
-                return str(v) if v else ''
-
-            status = parse_text(fields.get('状态', '')).strip()
-
-            # 只处理"已确认"状态
-            if status != '已确认':
-                continue
-
-            original_record_id = parse_text(fields.get('记录ID', '')).strip()
-            final_purpose = parse_text(fields.get('最终支出目的', '')).strip()
-            final_subcat = parse_text(fields.get('最终细类', '')).strip()
-
-            if not original_record_id:
-                continue
-
-            update_fields = {}
-            if final_purpose:
-                update_fields['支出目的'] = final_purpose
-            if final_subcat:
-                update_fields['细类'] = final_subcat
-
-            if update_fields:
-                updates.append({
-                    'record_id': original_record_id,
-                    'fields': update_fields,
-                    'review_record_id': review_record_id
-                })
+        for items in self.feishu.iter_records(
+            app_token=self.app_token,
+            table_id=self.review_table_id,
+            page_size=500,
+            field_names=['状态', '记录ID', '最终支出目的', '最终细类']
+        ):
+            total_records += len(items)
+            for record in items:
+                fields = record.get('fields', {})
+                review_record_id = record.get('record_id')
+
+                # 提取字段
+                status = parse_field_text(fields.get('状态', '')).strip()
+
+                # 只处理"已确认"状态
+                if status != '已确认':
+                    continue
+
+                original_record_id = parse_field_text(fields.get('记录ID', '')).strip()
+                final_purpose = parse_field_text(fields.get('最终支出目的', '')).strip()
+                final_subcat = parse_field_text(fields.get('最终细类', '')).strip()
+
+                if not original_record_id:
+                    continue
+
+                update_fields = {}
+                if final_purpose:
+                    update_fields['支出目的'] = final_purpose
+                if final_subcat:
+                    update_fields['细类'] = final_subcat
+
+                if update_fields:
+                    updates.append({
+                        'record_id': original_record_id,
+                        'fields': update_fields,
+                        'review_record_id': review_record_id
+                    })
 
+        logger.info(f"读取到 {total_records} 条审核记录")
         logger.info(f"找到 {len(updates)} 条需要同步的记录")
 
         if not updates:
@@ -431,52 +397,52 @@ class FeishuReviewWorkflow:
 
         logger.info("开始同步...")
 
-        # 批量更新原表
-        batch_size = 100
+        # 批量更新原表 (各批次并发在途, 客户端处理限流和失败降级)
+        # 审核表状态属于另一张表, 某批次原表更新一完成就立刻提交对应的
+        # 状态批次, 两条写入流水线重叠, 不再等原表全部写完才开始刷状态
+        batch_size = FeishuClient.MAX_BATCH
         success_count = 0
-        review_updates = []
-
-        for i in range(0, len(updates), batch_size):
-            batch = updates[i:i + batch_size]
-
-            try:
-                # 更新原表
-                records = [{'record_id': u['record_id'], 'fields': u['fields']} for u in batch]
-                result = self.feishu.batch_update_records(
-                    app_token=self.app_token,
-                    table_id=self.table_id,
-                    records=records
-                )
+        executor = self.feishu.executor
 
-                success_count += result.get('success', 0)
-                logger.info(f"批次 {i//batch_size + 1}: 成功同步 {result.get('success', 0)} 条")
-
-                # 记录需要更新状态的审核记录
-                for u in batch:
-                    review_updates.append({
-                        'record_id': u['review_record_id'],
-                        'fields': {'状态': '已同步'}
-                    })
-
-                time.sleep(0.2)
+        batches = [
+            updates[i:i + batch_size]
+            for i in range(0, len(updates), batch_size)
+        ]
+        main_futures = [
+            executor.submit(
+                self.feishu.batch_update_records,
+                app_token=self.app_token,
+                table_id=self.table_id,
+                records=[{'record_id': u['record_id'], 'fields': u['fields']} for u in batch]
+            )
+            for batch in batches
+        ]
 
-            except Exception as e:
-                logger.error(f"批次 {i//batch_size + 1} 同步失败: {e}")
+        status_futures = []
+        for batch_no, (batch, future) in enumerate(zip(batches, main_futures), 1):
+            result = future.result()
+            success_count += result.get('success', 0)
+            logger.info(f"批次 {batch_no}: 成功同步 {result.get('success', 0)} 条")
+
+            # 该批原表更新已落地, 马上调度审核表状态更新, 不等后续批次
+            status_batch = [
+                {'record_id': u['review_record_id'], 'fields': {'状态': '已同步'}}
+                for u in batch
+            ]
+            status_futures.append(executor.submit(
+                self.feishu.batch_update_records,
+                app_token=self.app_token,
+                table_id=self.review_table_id,
+                records=status_batch
+            ))
 
-        # 更新审核表状态
+        # 收尾: 等所有状态批次落地
         logger.info("更新审核表状态...")
-        for i in range(0, len(review_updates), batch_size):
-            batch = review_updates[i:i + batch_size]
-
-            try:
-                self.feishu.batch_update_records(
-                    app_token=self.app_token,
-                    table_id=self.review_table_id,
-                    records=batch
-                )
-                time.sleep(0.2)
-            except Exception as e:
-                logger.error(f"更新审核表状态失败: {e}")
+        status_failed = sum(
+            f.result().get('failed', 0) for f in status_futures
+        )
+        if status_failed > 0:
+            logger.error(f"更新审核表状态失败: {status_failed} 条")
 
         logger.info(f"同步完成: {success_count}/{len(updates)}")
 
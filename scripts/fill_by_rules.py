@@ -5,7 +5,6 @@
 """
 import sys
 from pathlib import Path
-import csv
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -13,56 +12,8 @@ sys.path.insert(0, str(project_root))
 
 from loguru import logger
 from core.config import Config
-from lib.feishu_client import FeishuClient
-
-
-class RuleMatcher:
-    """规则匹配器"""
-
-    def __init__(self, rules_file: str):
-        self.rules = []
-        self.load_rules(rules_file)
-
-    def load_rules(self, rules_file: str):
-        """从CSV加载规则"""
-        with open(rules_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                # 跳过禁用的规则
-                if row.get('enabled', 'TRUE').upper() != 'TRUE':
-                    continue
-
-                self.rules.append({
-                    'keyword': row['keyword'],
-                    'category': row['category'],
-                    'purpose': row['purpose'],
-                    'subcat': row['subcat'],
-                    'confidence': row.get('confidence', ''),
-                })
-
-        logger.info(f"加载了 {len(self.rules)} 条启用的规则")
-
-    def match(self, note: str, category: str):
-        """
-        匹配规则
-
-        :return: (purpose, subcat) or (None, None)
-        """
-        note = note.strip()
-        category = category.strip()
-
-        # 尝试匹配规则
-        for rule in self.rules:
-            # 检查分类是否匹配
-            if rule['category'] != category:
-                continue
-
-            # 检查备注是否包含关键词
-            if rule['keyword'] in note:
-                return rule['purpose'], rule['subcat']
-
-        return None, None
+from lib.feishu_client import FeishuClient, parse_field_text
+from scripts.validate_rules import RuleMatcher
 
 
 def fill_by_rules(
@@ -107,84 +58,72 @@ def fill_by_rules(
         app_secret=mcp_config['app_secret']
     )
 
-    # 拉取记录
+    # 拉取记录 (逐页流式筛选, 预取见iter_records, 不整表攒在内存)
     logger.info("拉取数据...")
-    all_records = []
-    page_token = None
-
-    while len(all_records) < max_fill * 2:
-        items, page_token, has_more = feishu.list_records(
-            app_token=app_token,
-            table_id=table_id,
-            page_token=page_token,
-            page_size=500
-        )
-
-        all_records.extend(items)
-
-        if not has_more:
-            break
-
-    logger.info(f"拉取到 {len(all_records)} 条记录")
+    page_size = 500
 
     # 筛选需要填充的记录
     to_fill = []
+    total_records = 0
+
+    for items in feishu.iter_records(
+        app_token=app_token,
+        table_id=table_id,
+        page_size=page_size,
+        max_pages=-(-(max_fill * 2) // page_size),
+        field_names=['收支', '备注', '分类', '支出目的', '细类']
+    ):
+        total_records += len(items)
+        for record in items:
+            fields = record.get('fields', {})
+            record_id = record.get('record_id')
+
+            # 只处理支出
+            if fields.get('收支') != '支出':
+                continue
 
-    for record in all_records:
-        fields = record.get('fields', {})
-        record_id = record.get('record_id')
-
-        # 只处理支出
-        if fields.get('收支') != '支出':
-            continue
-
-        # 提取字段
-        def parse_text(v):
-            if isinstance(v, str):
-                return v
-            if isinstance(v, list) and v:
-                return parse_text(v[0])
-            if isinstance(v, dict):
-                return str(v.get('text', ''))
-            return str(v) if v else ''
-
-        note_field = fields.get('备注', '')
-        note = parse_text(note_field).strip()
+            # 提取字段
+            note_field = fields.get('备注', '')
+            note = parse_field_text(note_field).strip()
 
-        category = str(fields.get('分类', '')).strip()
-        current_purpose = str(fields.get('支出目的', '')).strip()
+            category = str(fields.get('分类', '')).strip()
+            current_purpose = str(fields.get('支出目的', '')).strip()
 
-        subcat_field = fields.get('细类')
-        current_subcat = parse_text(subcat_field).strip()
+            subcat_field = fields.get('细类')
+            current_subcat = parse_field_text(subcat_field).strip()
 
-        if not note or not category:
-            continue
+            if not note or not category:
+                continue
 
-        # 判断是否需要填充
-        need_fill = False
+            # 判断是否需要填充
+            need_fill = False
 
-        if overwrite:
-            # 覆盖模式：所有记录都尝试填充
-            need_fill = True
-        else:
-            # 默认模式：只填充空字段
-            if not current_purpose or not current_subcat:
+            if overwrite:
+                # 覆盖模式：所有记录都尝试填充
                 need_fill = True
+            else:
+                # 默认模式：只填充空字段
+                if not current_purpose or not current_subcat:
+                    need_fill = True
 
-        if not need_fill:
-            continue
+            if not need_fill:
+                continue
 
-        to_fill.append({
-            'record_id': record_id,
-            'note': note,
-            'category': category,
-            'current_purpose': current_purpose,
-            'current_subcat': current_subcat
-        })
+            to_fill.append({
+                'record_id': record_id,
+                'note': note,
+                'category': category,
+                'current_purpose': current_purpose,
+                'current_subcat': current_subcat
+            })
+
+            if len(to_fill) >= max_fill:
+                break
 
         if len(to_fill) >= max_fill:
             break
 
+    logger.info(f"拉取到 {total_records} 条记录")
     logger.info(f"找到 {len(to_fill)} 条记录需要填充")
 
     # 匹配规则并填充
@@ -270,8 +209,8 @@ def fill_by_rules(
 
         logger.info("开始批量更新...")
 
-        # 批量更新（每次100条）
-        batch_size = 100
+        # 批量更新（按API上限500条/批, 失败时客户端自动对半拆批重试）
+        batch_size = FeishuClient.MAX_BATCH
         success_count = 0
         failed_count = 0
 
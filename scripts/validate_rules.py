@@ -6,6 +6,8 @@
 import sys
 from pathlib import Path
 import csv
+from datetime import datetime
+from functools import lru_cache
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -13,7 +15,12 @@ sys.path.insert(0, str(project_root))
 
 from loguru import logger
 from core.config import Config
-from lib.feishu_client import FeishuClient
+from lib.feishu_client import FeishuClient, parse_field_text
+
+try:
+    import ahocorasick  # 可选依赖: C实现的多模式串匹配(pyahocorasick)
+except ImportError:
+    ahocorasick = None
 
 
 class RuleMatcher:
@@ -21,6 +28,9 @@ class RuleMatcher:
 
     def __init__(self, rules_file: str):
         self.rules = []
+        # 账单备注大量重复, 按 (note, category) 记忆化匹配结果;
+        # 包装挂在实例上, 各实例缓存互不串扰
+        self.match = lru_cache(maxsize=8192)(self._match)
         self.load_rules(rules_file)
 
     def load_rules(self, rules_file: str):
@@ -38,25 +48,74 @@ class RuleMatcher:
                     'category': row['category'],
                     'purpose': row['purpose'],
                     'subcat': row['subcat'],
+                    'confidence': row.get('confidence', ''),
                 })
 
+        # 按分类分桶: 线性回退路径只扫描本分类的规则,
+        # 不再逐条跳过其它分类
+        buckets = {}
+        for rule in self.rules:
+            buckets.setdefault(rule['category'], []).append(rule)
+        self._rules_by_category = buckets
+
+        self._build_automata()
+        # 规则集变了, 已缓存的匹配结果作废
+        self.match.cache_clear()
+
         logger.info(f"加载了 {len(self.rules)} 条启用的规则")
 
-    def match(self, note: str, category: str):
+    def _build_automata(self):
+        """
+        按分类预编译Aho-Corasick自动机
+        匹配时一次扫描即可命中该分类下的任意关键词, 代替逐规则的
+        Python子串查找; 未安装pyahocorasick时退回线性扫描
+        """
+        if ahocorasick is None:
+            self._automata = None
+            return
+
+        automata = {}
+        for index, rule in enumerate(self.rules):
+            automaton = automata.setdefault(
+                rule['category'], ahocorasick.Automaton()
+            )
+            # 同分类下关键词重复时保留文件中靠前的规则, 与线性扫描一致
+            if not automaton.exists(rule['keyword']):
+                automaton.add_word(
+                    rule['keyword'],
+                    (index, rule['purpose'], rule['subcat'])
+                )
+
+        for automaton in automata.values():
+            automaton.make_automaton()
+
+        self._automata = automata
+
+    def _match(self, note: str, category: str):
         """
-        匹配规则
+        匹配规则 (未缓存实现, 调用方走实例上的match包装)
 
         :return: (purpose, subcat) or (None, None)
         """
         note = note.strip()
         category = category.strip()
 
-        # 尝试匹配规则
-        for rule in self.rules:
-            # 检查分类是否匹配
-            if rule['category'] != category:
-                continue
-
+        if self._automata is not None:
+            automaton = self._automata.get(category)
+            if automaton is None:
+                return None, None
+
+            # 取规则文件中最靠前的命中, 保持与逐条扫描相同的优先级
+            best = None
+            for _, payload in automaton.iter(note):
+                if best is None or payload[0] < best[0]:
+                    best = payload
+            if best is not None:
+                return best[1], best[2]
+            return None, None
+
+        # 纯Python回退: 只扫描该分类桶内的规则
+        for rule in self._rules_by_category.get(category, ()):
             # 检查备注是否包含关键词
             if rule['keyword'] in note:
                 return rule['purpose'], rule['subcat']
@@ -106,113 +165,94 @@ def validate_rules(
         app_secret=mcp_config['app_secret']
     )
 
-    # 拉取记录
+    # 拉取记录 (逐页流式校验, 预取见iter_records, 不整表攒在内存)
     logger.info("拉取数据...")
-    all_records = []
-    page_token = None
-
-    while len(all_records) < max_records:
-        items, page_token, has_more = feishu.list_records(
-            app_token=app_token,
-            table_id=table_id,
-            page_token=page_token,
-            page_size=500
-        )
-
-        all_records.extend(items)
-
-        if not has_more:
-            break
-
-    logger.info(f"拉取到 {len(all_records)} 条记录")
+    page_size = 500
 
     # 校验记录
     results = []
+    total_records = 0
     match_count = 0
     mismatch_count = 0
     no_rule_count = 0
 
-    for record in all_records:
-        fields = record.get('fields', {})
-        record_id = record.get('record_id')
-
-        # 只处理支出
-        if fields.get('收支') != '支出':
-            continue
-
-        # 提取字段
-        def parse_text(v):
-            if isinstance(v, str):
-                return v
-            if isinstance(v, list) and v:
-                return parse_text(v[0])
-            if isinstance(v, dict):
-                return str(v.get('text', ''))
-            return str(v) if v else ''
-
-        note_field = fields.get('备注', '')
-        note = parse_text(note_field).strip()
-
-        category = str(fields.get('分类', '')).strip()
-        current_purpose = str(fields.get('支出目的', '')).strip()
-
-        subcat_field = fields.get('细类')
-        current_subcat = parse_text(subcat_field).strip()
-
-        # 处理日期
-        date_field = fields.get('日期')
-        if isinstance(date_field, (int, float)):
-            from datetime import datetime
-            date_str = datetime.fromtimestamp(date_field / 1000).strftime('%Y-%m-%d')
-        else:
-            date_str = ''
-
-        # 处理金额
-        amount = fields.get('金额', 0)
-
-        if not note or not category:
-            continue
-
-        # 匹配规则
-        predicted_purpose, predicted_subcat = matcher.match(note, category)
-
-        # 判断是否一致
-        purpose_match = (current_purpose == predicted_purpose) if predicted_purpose else None
-        subcat_match = (current_subcat == predicted_subcat) if predicted_subcat else None
-
-        # 统计
-        if predicted_purpose is None and predicted_subcat is None:
-            no_rule_count += 1
-            status = 'NO_RULE'
-        elif purpose_match and subcat_match:
-            match_count += 1
-            status = 'MATCH'
-        else:
-            mismatch_count += 1
-            status = 'MISMATCH'
-
-        # 记录结果
-        result = {
-            'record_id': record_id,
-            'date': date_str,
-            'amount': amount,
-            'category': category,
-            'note': note,
-            'current_purpose': current_purpose,
-            'current_subcat': current_subcat,
-            'predicted_purpose': predicted_purpose or '',
-            'predicted_subcat': predicted_subcat or '',
-            'status': status,
-            'action': ''  # 用户可以填写: UPDATE/IGNORE/DELETE_RULE
-        }
-
-        # 根据参数决定是否导出
-        if only_mismatch:
-            if status == 'MISMATCH':
-                results.append(result)
-        else:
-            results.append(result)
+    for items in feishu.iter_records(
+        app_token=app_token,
+        table_id=table_id,
+        page_size=page_size,
+        max_pages=-(-max_records // page_size),
+        field_names=['收支', '备注', '分类', '支出目的', '细类', '日期', '金额']
+    ):
+        total_records += len(items)
+        for record in items:
+            fields = record.get('fields', {})
+            record_id = record.get('record_id')
+
+            # 只处理支出
+            if fields.get('收支') != '支出':
+                continue
+
+            # 提取字段
+            note_field = fields.get('备注', '')
+            note = parse_field_text(note_field).strip()
+
+            category = str(fields.get('分类', '')).strip()
+            current_purpose = str(fields.get('支出目的', '')).strip()
+
+            subcat_field = fields.get('细类')
+            current_subcat = parse_field_text(subcat_field).strip()
+
+            # 处理日期
+            date_field = fields.get('日期')
+            if isinstance(date_field, (int, float)):
+                date_str = datetime.fromtimestamp(date_field / 1000).strftime('%Y-%m-%d')
+            else:
+                date_str = ''
+
+            # 处理金额
+            amount = fields.get('金额', 0)
+
+            if not note or not category:
+                continue
+
+            # 匹配规则
+            predicted_purpose, predicted_subcat = matcher.match(note, category)
+
+            # 判断是否一致
+            purpose_match = (current_purpose == predicted_purpose) if predicted_purpose else None
+            subcat_match = (current_subcat == predicted_subcat) if predicted_subcat else None
+
+            # 统计
+            if predicted_purpose is None and predicted_subcat is None:
+                no_rule_count += 1
+                status = 'NO_RULE'
+            elif purpose_match and subcat_match:
+                match_count += 1
+                status = 'MATCH'
+            else:
+                mismatch_count += 1
+                status = 'MISMATCH'
+
+            # 根据参数决定是否导出
+            if only_mismatch and status != 'MISMATCH':
+                continue
 
+            # 记录结果
+            results.append({
+                'record_id': record_id,
+                'date': date_str,
+                'amount': amount,
+                'category': category,
+                'note': note,
+                'current_purpose': current_purpose,
+                'current_subcat': current_subcat,
+                'predicted_purpose': predicted_purpose or '',
+                'predicted_subcat': predicted_subcat or '',
+                'status': status,
+                'action': ''  # 用户可以填写: UPDATE/IGNORE/DELETE_RULE
+            })
+
+    logger.info(f"拉取到 {total_records} 条记录")
     logger.info(f"校验完成: 匹配 {match_count}, 不匹配 {mismatch_count}, 无规则 {no_rule_count}")
 
     # 导出到CSV
@@ -6,10 +6,37 @@ import json
 import os
 import re
 
+try:
+    import orjson
+except ImportError:  # 可选依赖, 缺失时走标准库
+    orjson = None
+
+# 按绝对路径缓存已解析的配置: {path: (mtime, Config实例)}
+_config_cache = {}
+
 
 class Config:
     """配置管理类"""
 
+    @classmethod
+    def load_cached(cls, config_file='config.json'):
+        """
+        带mtime校验的缓存加载
+        定时任务每次触发都重新读盘+解析config.json太浪费,
+        文件未变化时直接复用进程内已解析的实例
+        :param config_file: 配置文件路径
+        :return: Config实例
+        """
+        path = os.path.abspath(config_file)
+        mtime = os.path.getmtime(path)
+        cached = _config_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        config = cls(config_file)
+        _config_cache[path] = (mtime, config)
+        return config
+
     def __init__(self, config_file='config.json'):
         """加载配置文件"""
         self.config_file = config_file
@@ -17,8 +44,14 @@ class Config:
         if not os.path.exists(config_file):
             raise FileNotFoundError(f"配置文件不存在: {config_file}")
 
-        with open(config_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        # 配置里带上持仓/自选列表后体积不小, orjson整块读字节解析
+        # 比标准库逐字符解码快数倍; 两条路径产出完全相同的dict
+        if orjson is not None:
+            with open(config_file, 'rb') as f:
+                self.data = orjson.loads(f.read())
+        else:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
 
         # 验证配置
         self._validate_config()
@@ -131,7 +164,9 @@ class Config:
     def get_mcp_server_config(self):
         """获取MCP服务器配置"""
         config = self.data.get('mcp_server', {})
-        command = config.get('command', [])
+        # 复制一份再拼参数: 直接extend会把认证参数反复追加进配置里的列表,
+        # 多次调用后argv越来越长且格式错误
+        command = list(config.get('command', []))
         command.extend([
             '-a', config.get('app_id'),
             '-s', config.get('app_secret')
@@ -263,5 +298,9 @@ class Config:
 
     def save(self):
         """保存配置到文件"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(self.config_file, 'wb') as f:
+                f.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
@@ -233,8 +233,6 @@ class AssetFeishuClient(FeishuClient):
         :param fields: 字段数据
         :return: 是否成功
         """
-        import requests
-
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.app_token}/tables/{table_id}/records/{record_id}"
 
         headers = {
@@ -245,8 +243,8 @@ class AssetFeishuClient(FeishuClient):
         data = {"fields": fields}
 
         try:
-            # 使用PUT方法更新记录
-            response = requests.put(url, headers=headers, json=data, timeout=10)
+            # 使用PUT方法更新记录 (复用基类的连接池会话)
+            response = self.session.put(url, headers=headers, json=data, timeout=10)
             result = response.json()
 
             if result.get("code") != 0:
@@ -0,0 +1,36 @@
+"""
+进程级共享HTTP会话
+定时任务每次触发都新建requests.Session的话, 每个HTTP调用都要
+重做一遍TCP+TLS握手; 这里按名称维护进程内单例Session,
+连接池跨cron触发复用, 握手成本只付一次
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 名称 -> Session单例
+# 按服务分会话: binance要走代理、飞书带鉴权头,
+# 混在一个Session里会互相污染配置
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_shared_session(name: str = 'default') -> requests.Session:
+    """
+    获取(必要时创建)指定名称的共享Session
+
+    :param name: 会话名称, 同名调用返回同一个实例
+    :return: 带连接池的requests.Session
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[name] = session
+    return session
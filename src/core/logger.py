@@ -42,7 +42,9 @@ def setup_logger(log_path='logs/', level='INFO', max_bytes=10485760, backup_coun
         format=log_format,
         level=level,
         colorize=True,
-        enqueue=True  # 线程安全
+        enqueue=True,     # 线程安全
+        backtrace=False,  # 异常时不展开完整调用链/变量快照,
+        diagnose=False    # 省掉格式化开销也避免日志里泄露密钥
     )
 
     # 文件输出 (无颜色,支持轮转)
@@ -59,7 +61,9 @@ def setup_logger(log_path='logs/', level='INFO', max_bytes=10485760, backup_coun
         retention=backup_count,  # 保留最近 backup_count 个文件
         compression="zip",       # 压缩旧日志
         encoding="utf-8",
-        enqueue=True
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
 
     logger.info(f"日志系统初始化完成: {log_file}")
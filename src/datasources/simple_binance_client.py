@@ -9,6 +9,8 @@ from typing import Dict, Optional
 from urllib.parse import urlencode
 import requests
 
+from core.http import get_shared_session
+
 
 class SimpleBinanceClient:
     """
@@ -36,7 +38,10 @@ class SimpleBinanceClient:
         else:
             self.base_url = "https://api.binance.com"
 
-        self.session = requests.Session()
+        # 进程级共享会话: 每小时的同步复用同一个连接池,
+        # 不再每次实例化都重做TLS握手
+        # (headers/proxies每次用相同值覆盖, 重复设置无副作用)
+        self.session = get_shared_session('binance')
         self.session.headers.update({
             'X-MBX-APIKEY': self.api_key
         })
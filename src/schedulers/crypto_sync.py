@@ -365,7 +365,7 @@ def sync_crypto(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 同步结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = CryptoSyncTask(config)
     return task.sync()
 
@@ -429,7 +429,7 @@ def send_daily_report(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 报告结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = DailyReportTask(config)
     return task.generate_report()
 
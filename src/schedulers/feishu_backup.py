@@ -10,7 +10,7 @@ from utils.feishu_backup import FeishuBackupManager
 
 def sync_feishu_backup(config_path: str = 'config.json') -> Dict:
     """执行飞书备份任务"""
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     asset_sync = config.get_asset_sync_config()
     feature_config = asset_sync.get('feishu_backup', {})
 
@@ -224,6 +224,6 @@ class FeishuChangeReviewTask:
 
 def sync_feishu_change_review(config_path: str = 'config.json') -> Dict:
     """入口函数"""
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = FeishuChangeReviewTask(config)
     return task.sync()
@@ -338,7 +338,7 @@ def generate_health_advice(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 执行结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = HealthAdvisorTask(config)
     return task.generate_advice()
 
@@ -376,7 +376,7 @@ def check_holding_periods(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 检查结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = HoldingPeriodReminderTask(config)
     return task.check_holding_periods()
 
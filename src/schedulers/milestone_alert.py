@@ -341,7 +341,7 @@ def check_milestones(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 检查结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = MilestoneAlertTask(config)
     return task.check_milestones()
 
@@ -597,7 +597,7 @@ def send_monthly_report(config_path: str = 'config.json'):
     from core.logger import setup_logger
     # setup_logger() # 如果外部没调，这里可以调。但通常 main.py 会调。
     
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = MonthlyReportTask(config)
     task.run()
 
@@ -692,7 +692,7 @@ def generate_weekly_report(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 报告结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = PeriodicReportTask(config)
     return task.generate_weekly_report()
 
@@ -704,7 +704,7 @@ def generate_monthly_report(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 报告结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = PeriodicReportTask(config)
     return task.generate_monthly_report()
 
@@ -284,7 +284,7 @@ def check_price_alerts(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 检查结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = PriceAlertTask(config)
     return task.check_alerts()
 
@@ -177,7 +177,7 @@ def create_daily_snapshot(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 快照结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = SnapshotTask(config)
     return task.create_snapshot()
 
@@ -347,7 +347,7 @@ def generate_error_summary(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 汇总结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = SyncErrorSummaryTask(config)
     return task.generate_error_summary()
 
@@ -211,7 +211,7 @@ def check_weight_reminder(config_path: str = 'config.json') -> Dict:
     :param config_path: 配置文件路径
     :return: 执行结果
     """
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     task = WeightReminderTask(config)
     return task.check_weight_record()
 
@@ -2,9 +2,10 @@
 AI 财务顾问模块
 使用 DeepSeek API 分析财务数据并给出建议
 """
-import requests
 import json
 from loguru import logger
+
+from core.http import get_shared_session
 from core.config import Config
 
 def get_financial_advice(config: Config, period_str: str, stats: dict, account_name: str = None) -> str:
@@ -235,7 +236,7 @@ def get_financial_advice(config: Config, period_str: str, stats: dict, account_n
         }
         
         logger.info(f"正在请求 DeepSeek AI 分析 ({model})...")
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = get_shared_session('deepseek').post(url, headers=headers, json=data, timeout=30)
         
         if response.status_code != 200:
             logger.error(f"DeepSeek API 请求失败: {response.status_code} - {response.text}")
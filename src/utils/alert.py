@@ -2,10 +2,10 @@
 告警通知模块
 支持飞书机器人推送告警消息和邮件通知
 """
-import requests
 from typing import Dict, Optional
 from datetime import datetime
 from loguru import logger
+from core.http import get_shared_session
 from utils.email_sender import EmailSender
 
 
@@ -92,7 +92,8 @@ class AlertManager:
         }
 
         try:
-            response = requests.post(
+            # webhook走共享会话, 连续几条告警复用同一条连接
+            response = get_shared_session('feishu_webhook').post(
                 self.webhook_url,
                 json=message,
                 timeout=10
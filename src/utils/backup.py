@@ -194,7 +194,7 @@ def create_backup(config_path: str = 'config.json') -> Dict:
     """
     from core.config import Config
 
-    config = Config(config_path)
+    config = Config.load_cached(config_path)
     db_config = config.get_database_config()
     backup_config = db_config.get('backup', {})
 
@@ -221,15 +221,20 @@ def create_backup(config_path: str = 'config.json') -> Dict:
 
 
 if __name__ == '__main__':
-    # 测试备份功能
+    # 命令行入口: 可手工执行, 也供调度器以子进程方式运行备份
+    # 最后一行输出结果JSON, 退出码标记成败
+    import json
     import sys
-    from pathlib import Path
 
     project_root = Path(__file__).parent.parent.parent
     sys.path.insert(0, str(project_root))
+    sys.path.insert(0, str(project_root / 'src'))
 
     from core.logger import setup_logger
     setup_logger(level='DEBUG')
 
-    result = create_backup()
+    config_path = sys.argv[1] if len(sys.argv) > 1 else 'config.json'
+    result = create_backup(config_path)
     print(f"\n备份结果: {result}")
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result.get('success') else 1)